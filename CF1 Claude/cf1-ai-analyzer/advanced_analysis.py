@@ -4,21 +4,104 @@ Enhanced capabilities for multi-document analysis, risk scoring, and comparative
 """
 
 import asyncio
-import json
+import contextlib
+import functools
+import hashlib
 import logging
 import math
+import os
+import random
 import re
+import zlib
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 
 import aiohttp
-from anthropic import Anthropic
+from anthropic import APIConnectionError, AsyncAnthropic, InternalServerError, RateLimitError
+from asyncio_throttle import Throttler
 import numpy as np
+import orjson
+import tiktoken
+
+from json_extraction import extract_json_block
 
 logger = logging.getLogger(__name__)
 
+# Claude fan-out limits
+CLAUDE_CONCURRENCY = int(os.getenv("CF1_CLAUDE_CONCURRENCY", "8"))  # Max in-flight Claude calls
+CLAUDE_MAX_RETRIES = 4  # Attempts per call on rate limits and transient errors
+CLAUDE_BACKOFF_BASE = 1.0  # Seconds, doubled on each retry
+CLAUDE_BACKOFF_MAX = 30.0
+CACHE_TTL = 3600 * 24  # 24 hours cache TTL for Claude responses
+# Sent with cached system prompts; harmless where prompt caching is generally available
+PROMPT_CACHING_HEADERS = {"anthropic-beta": "prompt-caching-2024-07-31"}
+
+# Model tier per analysis phase - only the final synthesis needs Opus
+PHASE_MODELS = {
+    "individual": "claude-3-5-sonnet-latest",
+    "consistency": "claude-3-5-haiku-latest",
+    "risk": "claude-3-5-sonnet-latest",  # Also used for the fused consistency/risk/market call
+    "market": "claude-3-5-haiku-latest",
+    "similar": "claude-3-5-haiku-latest",
+    "insights": "claude-3-opus-20240229",
+}
+
+MAX_CONTENT_LENGTH = int(os.getenv("CF1_MAX_CONTENT_TOKENS", "3000"))  # Tokens per document chunk
+
+# Local index of historical projects used for comparables (JSON list of project records)
+PROJECT_INDEX_PATH = os.getenv("CF1_PROJECT_INDEX_PATH", "")
+PROJECT_VECTOR_DIM = 1024  # Hashed bag-of-words dimensions
+SIMILAR_PROJECTS_K = 5
+
+# Overall score weights: market opportunity, team quality, financial projections,
+# risk profile, competitive position, execution capability
+_WEIGHTS = np.array([0.25, 0.20, 0.20, 0.15, 0.10, 0.10])
+
+
+@functools.lru_cache(maxsize=1)
+def _get_tokenizer() -> tiktoken.Encoding:
+    """Load the tokenizer once; cl100k_base is a close enough proxy for Claude's token counts"""
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def _split_by_tokens(text: str, max_tokens: int) -> List[str]:
+    """Split text into consecutive pieces of at most max_tokens tokens"""
+    encoding = _get_tokenizer()
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return [text]
+    
+    return [
+        encoding.decode(tokens[start:start + max_tokens])
+        for start in range(0, len(tokens), max_tokens)
+    ]
+
+async def call_claude_with_backoff(
+    call: Callable[[], Awaitable[Any]],
+    semaphore: asyncio.Semaphore,
+    throttler=contextlib.nullcontext()
+) -> Any:
+    """Run a Claude call under a concurrency limit and optional throttler, backing off on transient errors
+
+    Rate limits, connection failures and 5xx responses are retried here, so the client
+    should be built with max_retries=0 to keep every attempt under the limits.
+    """
+    for attempt in range(CLAUDE_MAX_RETRIES):
+        try:
+            async with semaphore, throttler:
+                return await call()
+        except (RateLimitError, APIConnectionError, InternalServerError) as e:
+            if attempt == CLAUDE_MAX_RETRIES - 1:
+                raise
+            # Exponential backoff with jitter so parallel callers don't retry in lockstep
+            delay = min(CLAUDE_BACKOFF_BASE * 2 ** attempt, CLAUDE_BACKOFF_MAX)
+            delay = random.uniform(delay / 2, delay)
+            reason = "rate limit hit" if isinstance(e, RateLimitError) else f"request failed ({e})"
+            logger.warning(f"Claude {reason}, retrying in {delay:.1f}s (attempt {attempt + 1}/{CLAUDE_MAX_RETRIES})")
+            await asyncio.sleep(delay)
+
 class DocumentType(Enum):
     BUSINESS_PLAN = "business_plan"
     FINANCIAL_PROJECTIONS = "financial_projections"
@@ -36,7 +119,13 @@ class RiskLevel(Enum):
     HIGH = "high"
     VERY_HIGH = "very_high"
 
-@dataclass
+@dataclass(slots=True)
+class DocumentRef:
+    doc_id: str
+    content: str
+    doc_type: DocumentType
+
+@dataclass(slots=True)
 class DocumentAnalysis:
     document_id: str
     document_type: DocumentType
@@ -46,7 +135,7 @@ class DocumentAnalysis:
     quality_indicators: Dict[str, float]
     extracted_data: Dict[str, Any]
 
-@dataclass
+@dataclass(slots=True)
 class RiskFactor:
     category: str
     description: str
@@ -55,7 +144,7 @@ class RiskFactor:
     impact_score: float
     mitigation_suggestions: List[str]
 
-@dataclass
+@dataclass(slots=True)
 class MarketIntelligence:
     market_size: str
     growth_rate: str
@@ -64,7 +153,7 @@ class MarketIntelligence:
     opportunity_score: float
     timing_assessment: str
 
-@dataclass
+@dataclass(slots=True)
 class AdvancedAnalysisResult:
     proposal_id: str
     analysis_timestamp: str
@@ -92,22 +181,250 @@ class AdvancedAnalysisResult:
     recommendations: List[str]
     due_diligence_checklist: List[str]
 
+# Severity strings returned by Claude, resolved without Enum value lookups
+_SEVERITY_MAP: Dict[str, RiskLevel] = {level.value: level for level in RiskLevel}
+_SEVERITY_DEFAULT = RiskLevel.MODERATE
+
+# Multiplier applied to likelihood x impact for each factor severity; one entry per RiskLevel
+_SEVERITY_WEIGHTS = {
+    RiskLevel.VERY_LOW: 0.25,
+    RiskLevel.LOW: 0.5,
+    RiskLevel.MODERATE: 1.0,
+    RiskLevel.HIGH: 1.5,
+    RiskLevel.VERY_HIGH: 2.0
+}
+
+# Upper score bounds for each risk category, checked in order
+_RISK_CATEGORY_THRESHOLDS = (
+    (0.2, RiskLevel.LOW),
+    (0.4, RiskLevel.MODERATE),
+    (0.6, RiskLevel.HIGH)
+)
+
+
+def _aggregate_risk(likelihoods: np.ndarray, impacts: np.ndarray, sev_weights: np.ndarray) -> float:
+    """Mean severity-weighted likelihood x impact across factors, clipped to 0.0-1.0"""
+    if not likelihoods.shape[0]:
+        return 0.5
+    return float(np.clip(np.mean(likelihoods * impacts * sev_weights), 0.0, 1.0))
+
+
+def _risk_category(overall_score: float) -> RiskLevel:
+    """Map an overall risk score onto a RiskLevel"""
+    for upper, level in _RISK_CATEGORY_THRESHOLDS:
+        if overall_score < upper:
+            return level
+    return RiskLevel.VERY_HIGH
+
+
+# Document types a complete proposal is expected to include
+_REQUIRED_DOCS = frozenset({
+    DocumentType.BUSINESS_PLAN,
+    DocumentType.FINANCIAL_PROJECTIONS,
+    DocumentType.MARKET_ANALYSIS,
+    DocumentType.TEAM_BIOS
+})
+
+
+@functools.lru_cache(maxsize=256)
+def _completeness_from_set(present_docs: frozenset) -> float:
+    """Share of required document types present; the keyspace is tiny so results are memoized"""
+    return len(present_docs & _REQUIRED_DOCS) / len(_REQUIRED_DOCS)
+
+
+# Document analysis instructions, filled with the document type; the content goes in the user turn
+_BASE_TEMPLATE = """
+        You are analyzing a {doc_type} document for an investment proposal.
+        Provide a detailed analysis in JSON format with the following structure:
+        
+        {{
+            "summary": "Concise summary of the document",
+            "key_metrics": {{}},
+            "confidence_score": 0.0-1.0,
+            "quality_indicators": {{}},
+            "extracted_data": {{}}
+        }}
+        
+        The document content is in the user message.
+        """
+
+# Per-type analysis focus appended to the base prompt
+_SPECIFIC_INSTRUCTIONS: Dict[DocumentType, str] = {
+    DocumentType.BUSINESS_PLAN: """
+    Focus on:
+    - Business model clarity and viability
+    - Market opportunity size and validation
+    - Competitive advantages and differentiation
+    - Revenue model and scalability
+    - Execution strategy and milestones
+
+    Extract: target_market, revenue_model, competitive_advantages, key_milestones
+    """,
+
+    DocumentType.FINANCIAL_PROJECTIONS: """
+    Focus on:
+    - Revenue growth assumptions and reasonableness
+    - Cost structure and margin analysis
+    - Cash flow projections and burn rate
+    - Break-even analysis and profitability timeline
+    - Funding requirements and use of capital
+
+    Extract: revenue_projections, break_even_month, funding_required, burn_rate
+    """,
+
+    DocumentType.MARKET_ANALYSIS: """
+    Focus on:
+    - Total addressable market (TAM) size and growth
+    - Target customer segments and validation
+    - Competitive landscape and positioning
+    - Market trends and timing
+    - Go-to-market strategy effectiveness
+
+    Extract: tam_size, market_growth_rate, target_segments, key_competitors
+    """,
+
+    DocumentType.TEAM_BIOS: """
+    Focus on:
+    - Relevant experience and track record
+    - Domain expertise and technical skills
+    - Previous startup/business experience
+    - Team completeness and complementary skills
+    - Advisory board strength
+
+    Extract: team_size, years_experience, previous_exits, domain_expertise
+    """,
+
+    DocumentType.LEGAL_DOCUMENTS: """
+    Focus on:
+    - Corporate structure and equity distribution
+    - Intellectual property protection
+    - Regulatory compliance status
+    - Legal risks and liabilities
+    - Contract and partnership agreements
+
+    Extract: legal_structure, ip_protection, regulatory_status, legal_risks
+    """,
+
+    DocumentType.TECHNICAL_SPECS: """
+    Focus on:
+    - Technical feasibility and innovation
+    - Scalability and architecture design
+    - Development timeline and milestones
+    - Technology risks and dependencies
+    - Competitive technical advantages
+
+    Extract: technology_stack, development_timeline, technical_risks, innovation_level
+    """
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _document_system_prompt(doc_type: DocumentType) -> str:
+    """Static per-type instructions for document analysis, identical across calls so Claude can cache them"""
+    return _BASE_TEMPLATE.format(doc_type=doc_type.value) + _SPECIFIC_INSTRUCTIONS.get(
+        doc_type, "Analyze comprehensively."
+    )
+
+
+def cached_system_prompt(text: str) -> List[Dict[str, Any]]:
+    """System blocks marking text as a cacheable prompt prefix (ignored by the API below its minimum length)"""
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _text_vector(text: str) -> np.ndarray:
+    """Unit-length hashed term-frequency vector; crc32 keeps buckets stable across processes"""
+    vec = np.zeros(PROJECT_VECTOR_DIM, dtype=np.float32)
+    buckets = [zlib.crc32(word.encode()) % PROJECT_VECTOR_DIM for word in _WORD_RE.findall(text.lower())]
+    if buckets:
+        np.add.at(vec, buckets, 1.0)
+        vec /= np.linalg.norm(vec)
+    return vec
+
+
+def _record_text(record: Any) -> str:
+    """Flatten the values of a JSON-like record into text; keys are shared by every record so they're skipped"""
+    if isinstance(record, dict):
+        return " ".join(_record_text(v) for v in record.values())
+    if isinstance(record, (list, tuple)):
+        return " ".join(_record_text(v) for v in record)
+    return str(record)
+
+
+class ProjectIndex:
+    """In-memory cosine similarity index over historical project records"""
+    
+    def __init__(self, projects: List[Dict[str, Any]]):
+        self.projects = projects
+        if projects:
+            self._matrix = np.vstack([_text_vector(_record_text(p)) for p in projects])
+        else:
+            self._matrix = np.empty((0, PROJECT_VECTOR_DIM), dtype=np.float32)
+    
+    @classmethod
+    def load(cls, path: str) -> "ProjectIndex":
+        """Load project records from a JSON file, returning an empty index if unavailable"""
+        if not path:
+            return cls([])
+        try:
+            with open(path, "rb") as f:
+                projects = orjson.loads(f.read())
+            logger.info(f"Loaded {len(projects)} historical projects from {path}")
+            return cls(projects)
+        except Exception as e:
+            logger.warning(f"Failed to load project index from {path}: {e}")
+            return cls([])
+    
+    def __len__(self) -> int:
+        return len(self.projects)
+    
+    def search(self, query: Dict[str, Any], k: int = SIMILAR_PROJECTS_K) -> List[Dict[str, Any]]:
+        """Return the k projects most similar to a proposal's data with a similarity_score, best first"""
+        if not self.projects:
+            return []
+        
+        scores = self._matrix @ _text_vector(_record_text(query))
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {**self.projects[i], "similarity_score": round(float(scores[i]), 3)}
+            for i in top if scores[i] > 0
+        ]
+
+
 class AdvancedAIAnalyzer:
-    def __init__(self, claude_client: Anthropic):
+    def __init__(
+        self,
+        claude_client: AsyncAnthropic,
+        throttler: Optional[Throttler] = None,
+        redis_client=None,
+        cache_ttl: int = CACHE_TTL,
+        project_index: Optional[ProjectIndex] = None
+    ):
         self.claude_client = claude_client
+        self.redis_client = redis_client  # Optional redis.asyncio client for response caching
+        self.cache_ttl = cache_ttl
         self.historical_data_cache = {}
         self.market_data_cache = {}
+        self.project_index = project_index if project_index is not None else ProjectIndex.load(PROJECT_INDEX_PATH)
+        
+        # Shared limits for every Claude call made by this analyzer
+        self._claude_sem = asyncio.Semaphore(CLAUDE_CONCURRENCY)
+        self._throttler = throttler or contextlib.nullcontext()
         
     async def analyze_multiple_documents(
         self, 
-        documents: List[Tuple[str, str, DocumentType]], 
+        documents: Sequence[DocumentRef], 
         proposal_id: str
     ) -> AdvancedAnalysisResult:
         """
         Perform advanced multi-document analysis with risk scoring and comparative intelligence
         
         Args:
-            documents: List of (document_id, content, document_type) tuples
+            documents: Documents to analyze, one DocumentRef per upload
             proposal_id: Unique proposal identifier
         
         Returns:
@@ -119,15 +436,15 @@ class AdvancedAIAnalyzer:
             # Phase 1: Individual document analysis
             document_analyses = await self._analyze_individual_documents(documents)
             
-            # Phase 2: Cross-document consistency check
-            consistency_score = await self._check_cross_document_consistency(document_analyses)
+            # Merge extracted data once; the downstream phases share it read-only
+            combined_data = self._combine_extracted_data(document_analyses)
             
-            # Phase 3: Advanced risk assessment
-            risk_assessment = await self._perform_risk_assessment(document_analyses, proposal_id)
-            
-            # Phase 4: Market intelligence and comparative analysis
-            market_intel = await self._gather_market_intelligence(document_analyses)
-            similar_projects = await self._find_similar_projects(document_analyses)
+            # Phases 2-4: consistency, risk and market intelligence come back from a
+            # single fused Claude call, run concurrently with comparative analysis
+            (consistency_score, risk_assessment, market_intel), similar_projects = await asyncio.gather(
+                self._perform_combined_assessment(document_analyses, combined_data, proposal_id),
+                self._find_similar_projects(document_analyses, combined_data)
+            )
             
             # Phase 5: Generate comprehensive insights
             insights = await self._generate_advanced_insights(
@@ -166,64 +483,158 @@ class AdvancedAIAnalyzer:
             logger.error(f"Advanced analysis failed for proposal {proposal_id}: {e}")
             raise
 
+    async def analyze_single_document(self, document: DocumentRef, proposal_id: str) -> AdvancedAnalysisResult:
+        """
+        Lean analysis for a lone document without sector context
+        
+        Skips the fused consistency/risk/market call and comparables search, which add
+        little for one document; risk and market fall back to their neutral defaults.
+        """
+        logger.info(f"Starting single-document analysis for proposal {proposal_id}")
+        
+        document_analyses = await self._analyze_individual_documents([document])
+        risk_assessment = self._default_risk_assessment()
+        market_intel = self._default_market_intelligence()
+        
+        insights = await self._generate_advanced_insights(document_analyses, risk_assessment, market_intel, [])
+        overall_score, investment_rec = await self._calculate_overall_assessment(
+            document_analyses, risk_assessment, market_intel, insights
+        )
+        
+        return AdvancedAnalysisResult(
+            proposal_id=proposal_id,
+            analysis_timestamp=datetime.now(timezone.utc).isoformat(),
+            overall_score=overall_score,
+            investment_recommendation=investment_rec,
+            document_analyses=document_analyses,
+            cross_document_consistency=1.0,  # Nothing to disagree with
+            information_completeness=self._calculate_completeness_score(document_analyses),
+            risk_factors=risk_assessment["factors"],
+            overall_risk_score=risk_assessment["overall_score"],
+            risk_category=risk_assessment["category"],
+            similar_projects=[],
+            success_probability=insights.get("success_probability", 0.5),
+            market_intelligence=market_intel,
+            strengths_detailed=insights.get("strengths", []),
+            concerns_detailed=insights.get("concerns", []),
+            recommendations=insights.get("recommendations", []),
+            due_diligence_checklist=insights.get("due_diligence", [])
+        )
+
     async def _analyze_individual_documents(
         self, 
-        documents: List[Tuple[str, str, DocumentType]]
+        documents: Sequence[DocumentRef]
     ) -> List[DocumentAnalysis]:
         """Analyze each document individually with specialized prompts"""
         
-        analyses = []
+        # Dispatch all documents concurrently - each call is network-bound
+        results = await asyncio.gather(
+            *[self._get_or_compute_doc_analysis(d.doc_id, d.content, d.doc_type) for d in documents],
+            return_exceptions=True
+        )
         
-        for doc_id, content, doc_type in documents:
-            try:
-                # Get specialized prompt for document type
-                prompt = self._get_document_specific_prompt(content, doc_type)
-                
-                # Analyze with Claude
-                response = self.claude_client.messages.create(
-                    model="claude-3-opus-20240229",
-                    max_tokens=3000,
-                    temperature=0.1,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                
-                # Parse response
-                analysis_data = self._parse_document_analysis_response(response.content[0].text)
-                
-                analysis = DocumentAnalysis(
-                    document_id=doc_id,
-                    document_type=doc_type,
-                    content_summary=analysis_data.get("summary", ""),
-                    key_metrics=analysis_data.get("key_metrics", {}),
-                    confidence_score=analysis_data.get("confidence_score", 0.5),
-                    quality_indicators=analysis_data.get("quality_indicators", {}),
-                    extracted_data=analysis_data.get("extracted_data", {})
-                )
-                
-                analyses.append(analysis)
-                
-            except Exception as e:
-                logger.error(f"Failed to analyze document {doc_id}: {e}")
+        analyses = []
+        for d, result in zip(documents, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to analyze document {d.doc_id}: {result}")
                 # Create placeholder analysis for failed documents
                 analyses.append(DocumentAnalysis(
-                    document_id=doc_id,
-                    document_type=doc_type,
+                    document_id=d.doc_id,
+                    document_type=d.doc_type,
                     content_summary="Analysis failed",
                     key_metrics={},
                     confidence_score=0.0,
                     quality_indicators={},
                     extracted_data={}
                 ))
+            else:
+                analyses.append(result)
         
         return analyses
 
-    def _get_document_specific_prompt(self, content: str, doc_type: DocumentType) -> str:
-        """Generate specialized analysis prompts based on document type"""
+    async def _get_or_compute_doc_analysis(
+        self, 
+        doc_id: str, 
+        content: str, 
+        doc_type: DocumentType
+    ) -> DocumentAnalysis:
+        """Analyze one document, reusing a cached analysis of identical content and type"""
+        
+        # Keyed by content rather than document id so a file shared across proposals is analyzed once
+        content_hash = hashlib.sha256(f"{doc_type.value}|{content}".encode()).hexdigest()
+        cache_key = f"docanalysis:{content_hash}"
+        
+        if self.redis_client:
+            try:
+                cached = await self.redis_client.get(cache_key)
+                if cached is not None:
+                    logger.info(f"Document analysis cache hit for {doc_id}")
+                    return DocumentAnalysis(**{
+                        **orjson.loads(cached),
+                        "document_id": doc_id,
+                        "document_type": doc_type
+                    })
+            except Exception as e:
+                logger.warning(f"Document analysis cache retrieval failed: {e}")
+        
+        # Long documents are split on token boundaries and analyzed chunk by chunk
+        chunks = _split_by_tokens(content, MAX_CONTENT_LENGTH)
+        
+        if len(chunks) == 1:
+            analysis_data = await self._analyze_chunk(content, doc_type)
+        else:
+            logger.info(f"Analyzing document {doc_id} in {len(chunks)} chunks")
+            chunk_analyses = await asyncio.gather(
+                *[self._analyze_chunk(chunk, doc_type) for chunk in chunks]
+            )
+            analysis_data = await self._merge_chunk_analyses(list(chunk_analyses), doc_type)
+        
+        analysis = DocumentAnalysis(
+            document_id=doc_id,
+            document_type=doc_type,
+            content_summary=analysis_data.get("summary", ""),
+            key_metrics=analysis_data.get("key_metrics", {}),
+            confidence_score=analysis_data.get("confidence_score", 0.5),
+            quality_indicators=analysis_data.get("quality_indicators", {}),
+            extracted_data=analysis_data.get("extracted_data", {})
+        )
+        
+        # An empty result means Claude's reply was unparseable; don't pin it to this content for cache_ttl
+        if self.redis_client and analysis_data:
+            try:
+                await self.redis_client.set(cache_key, orjson.dumps(asdict(analysis)), ex=self.cache_ttl)
+            except Exception as e:
+                logger.warning(f"Document analysis cache storage failed: {e}")
+        
+        return analysis
+
+    async def _analyze_chunk(self, content: str, doc_type: DocumentType) -> Dict[str, Any]:
+        """Analyze a single document chunk with the document-type prompt"""
         
-        base_instruction = f"""
-        You are analyzing a {doc_type.value} document for an investment proposal.
-        Provide a detailed analysis in JSON format with the following structure:
+        # Analyze with Claude; the per-type instructions are a cached system prefix
+        return await self._cached_claude_json(
+            model=PHASE_MODELS["individual"],
+            system=_document_system_prompt(doc_type),
+            prompt=f"Document content:\n{content}",
+            max_tokens=3000,
+            temperature=0.1
+        )
+
+    async def _merge_chunk_analyses(
+        self, 
+        chunk_analyses: List[Dict[str, Any]], 
+        doc_type: DocumentType
+    ) -> Dict[str, Any]:
+        """Reduce per-chunk analyses of one document into a single analysis"""
+        
+        merge_prompt = f"""
+        These are analyses of consecutive sections of the same {doc_type.value} document.
+        Merge them into one analysis of the whole document: combine the summaries, keep every
+        distinct metric and extracted field, and resolve duplicates in favour of the most specific value.
         
+        Section analyses: {orjson.dumps(chunk_analyses).decode()}
+        
+        Return JSON in the same structure:
         {{
             "summary": "Concise summary of the document",
             "key_metrics": {{}},
@@ -231,80 +642,108 @@ class AdvancedAIAnalyzer:
             "quality_indicators": {{}},
             "extracted_data": {{}}
         }}
-        
-        Document content:
-        {content[:12000]}
         """
         
-        specific_instructions = {
-            DocumentType.BUSINESS_PLAN: """
-            Focus on:
-            - Business model clarity and viability
-            - Market opportunity size and validation
-            - Competitive advantages and differentiation
-            - Revenue model and scalability
-            - Execution strategy and milestones
-            
-            Extract: target_market, revenue_model, competitive_advantages, key_milestones
-            """,
-            
-            DocumentType.FINANCIAL_PROJECTIONS: """
-            Focus on:
-            - Revenue growth assumptions and reasonableness
-            - Cost structure and margin analysis
-            - Cash flow projections and burn rate
-            - Break-even analysis and profitability timeline
-            - Funding requirements and use of capital
-            
-            Extract: revenue_projections, break_even_month, funding_required, burn_rate
-            """,
-            
-            DocumentType.MARKET_ANALYSIS: """
-            Focus on:
-            - Total addressable market (TAM) size and growth
-            - Target customer segments and validation
-            - Competitive landscape and positioning
-            - Market trends and timing
-            - Go-to-market strategy effectiveness
-            
-            Extract: tam_size, market_growth_rate, target_segments, key_competitors
-            """,
-            
-            DocumentType.TEAM_BIOS: """
-            Focus on:
-            - Relevant experience and track record
-            - Domain expertise and technical skills
-            - Previous startup/business experience
-            - Team completeness and complementary skills
-            - Advisory board strength
-            
-            Extract: team_size, years_experience, previous_exits, domain_expertise
-            """,
-            
-            DocumentType.LEGAL_DOCUMENTS: """
-            Focus on:
-            - Corporate structure and equity distribution
-            - Intellectual property protection
-            - Regulatory compliance status
-            - Legal risks and liabilities
-            - Contract and partnership agreements
-            
-            Extract: legal_structure, ip_protection, regulatory_status, legal_risks
-            """,
-            
-            DocumentType.TECHNICAL_SPECS: """
-            Focus on:
-            - Technical feasibility and innovation
-            - Scalability and architecture design
-            - Development timeline and milestones
-            - Technology risks and dependencies
-            - Competitive technical advantages
+        try:
+            merged = await self._cached_claude_json(
+                model=PHASE_MODELS["individual"],
+                prompt=merge_prompt,
+                max_tokens=3000,
+                temperature=0.1
+            )
+            if merged:
+                return merged
             
-            Extract: technology_stack, development_timeline, technical_risks, innovation_level
-            """
+        except Exception as e:
+            logger.error(f"Chunk merge failed: {e}")
+        
+        # Fall back to a mechanical merge so the document isn't lost
+        merged = {"key_metrics": {}, "quality_indicators": {}, "extracted_data": {}}
+        for chunk_analysis in chunk_analyses:
+            for field in merged:
+                merged[field].update(chunk_analysis.get(field, {}))
+        merged["summary"] = " ".join(a.get("summary", "") for a in chunk_analyses).strip()
+        merged["confidence_score"] = sum(
+            a.get("confidence_score", 0.5) for a in chunk_analyses
+        ) / len(chunk_analyses)
+        return merged
+
+    async def _call_with_backoff(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a Claude call under the shared concurrency limits, backing off on rate limit errors"""
+        return await call_claude_with_backoff(call, self._claude_sem, self._throttler)
+
+    async def _create_message(self, **kwargs):
+        """Create a Claude message and wait for the complete response"""
+        return await self._call_with_backoff(lambda: self.claude_client.messages.create(**kwargs))
+
+    async def _stream_message(self, **kwargs) -> str:
+        """Stream a Claude message and return the accumulated text"""
+        
+        async def _consume() -> str:
+            text_parts = []
+            async with self.claude_client.messages.stream(**kwargs) as stream:
+                async for text in stream.text_stream:
+                    text_parts.append(text)
+            return "".join(text_parts)
+        
+        return await self._call_with_backoff(_consume)
+
+    async def _cached_claude_json(
+        self,
+        *,
+        model: str,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system: Optional[str] = None,
+        stream: bool = False
+    ) -> Dict[str, Any]:
+        """Return Claude's parsed JSON reply for a prompt, served from Redis when the same request was seen before
+
+        Only replies that parse to a non-empty object are cached, so a truncated or
+        malformed reply is retried on the next call instead of pinned to the prompt.
+
+        Long responses can be streamed so the connection is released as soon as
+        generation ends and a cancelled caller stops the generation mid-way.
+        A static system prompt is sent as a cached prefix so repeated calls skip re-encoding it.
+        """
+        cache_key = "claude:json:" + hashlib.sha256(
+            f"{model}|{max_tokens}|{temperature}|{system or ''}|{prompt}".encode()
+        ).hexdigest()
+        
+        if self.redis_client:
+            try:
+                cached = await self.redis_client.get(cache_key)
+                if cached is not None:
+                    logger.info(f"Claude cache hit for key: {cache_key[:28]}...")
+                    return orjson.loads(cached)
+            except Exception as e:
+                logger.warning(f"Claude cache retrieval failed: {e}")
+        
+        request = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": [{"role": "user", "content": prompt}]
         }
+        if system:
+            request["system"] = cached_system_prompt(system)
+            request["extra_headers"] = PROMPT_CACHING_HEADERS
+        if stream:
+            response_text = await self._stream_message(**request)
+        else:
+            response = await self._create_message(**request)
+            response_text = response.content[0].text
         
-        return base_instruction + specific_instructions.get(doc_type, "Analyze comprehensively.")
+        data = self._parse_json_response(response_text)
+        
+        if self.redis_client and data:
+            try:
+                await self.redis_client.set(cache_key, orjson.dumps(data), ex=self.cache_ttl)
+            except Exception as e:
+                logger.warning(f"Claude cache storage failed: {e}")
+        
+        return data
 
     async def _check_cross_document_consistency(
         self, 
@@ -315,6 +754,10 @@ class AdvancedAIAnalyzer:
         if len(document_analyses) < 2:
             return 1.0
         
+        # Nothing was extracted, so there is nothing to compare - skip the Claude call
+        if not any(a.extracted_data for a in document_analyses):
+            return 0.8
+        
         # Extract key metrics for comparison
         financial_data = []
         market_data = []
@@ -331,23 +774,21 @@ class AdvancedAIAnalyzer:
         consistency_prompt = f"""
         Check for consistency across these document analyses:
         
-        Financial Data: {json.dumps(financial_data, indent=2)}
-        Market Data: {json.dumps(market_data, indent=2)}
-        Team Data: {json.dumps(team_data, indent=2)}
+        Financial Data: {orjson.dumps(financial_data).decode()}
+        Market Data: {orjson.dumps(market_data).decode()}
+        Team Data: {orjson.dumps(team_data).decode()}
         
         Provide a consistency score from 0.0 to 1.0 and identify any major inconsistencies.
         Return JSON: {{"consistency_score": 0.0-1.0, "inconsistencies": ["list of issues"]}}
         """
         
         try:
-            response = self.claude_client.messages.create(
-                model="claude-3-opus-20240229",
+            result = await self._cached_claude_json(
+                model=PHASE_MODELS["consistency"],
+                prompt=consistency_prompt,
                 max_tokens=1000,
-                temperature=0.1,
-                messages=[{"role": "user", "content": consistency_prompt}]
+                temperature=0.1
             )
-            
-            result = self._parse_json_response(response.content[0].text)
             return result.get("consistency_score", 0.8)
             
         except Exception as e:
@@ -357,19 +798,22 @@ class AdvancedAIAnalyzer:
     async def _perform_risk_assessment(
         self, 
         document_analyses: List[DocumentAnalysis], 
-        proposal_id: str
+        proposal_id: str,
+        combined_data: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Perform comprehensive risk assessment"""
         
-        # Combine all extracted data for risk analysis
-        combined_data = {}
-        for analysis in document_analyses:
-            combined_data.update(analysis.extracted_data)
+        # Combine all extracted data for risk analysis unless the caller already did
+        if combined_data is None:
+            combined_data = self._combine_extracted_data(document_analyses)
+        
+        if not combined_data:
+            return self._default_risk_assessment()
         
         risk_prompt = f"""
         Perform a comprehensive risk assessment for this investment proposal.
         
-        Combined Data: {json.dumps(combined_data, indent=2)}
+        Combined Data: {orjson.dumps(combined_data).decode()}
         
         Analyze risks in these categories:
         1. Market Risk - competition, market size, timing
@@ -390,48 +834,22 @@ class AdvancedAIAnalyzer:
                     "impact_score": 0.0-1.0,
                     "mitigation_suggestions": ["suggestion1", "suggestion2"]
                 }}
-            ],
-            "overall_risk_score": 0.0-1.0,
-            "risk_category": "low|moderate|high|very_high"
+            ]
         }}
         """
         
         try:
-            response = self.claude_client.messages.create(
-                model="claude-3-opus-20240229",
+            risk_data = await self._cached_claude_json(
+                model=PHASE_MODELS["risk"],
+                prompt=risk_prompt,
                 max_tokens=2500,
-                temperature=0.1,
-                messages=[{"role": "user", "content": risk_prompt}]
+                temperature=0.1
             )
-            
-            risk_data = self._parse_json_response(response.content[0].text)
-            
-            # Convert to RiskFactor objects
-            risk_factors = []
-            for factor_data in risk_data.get("risk_factors", []):
-                risk_factor = RiskFactor(
-                    category=factor_data.get("category", "Unknown"),
-                    description=factor_data.get("description", ""),
-                    severity=RiskLevel(factor_data.get("severity", "moderate")),
-                    likelihood=factor_data.get("likelihood", 0.5),
-                    impact_score=factor_data.get("impact_score", 0.5),
-                    mitigation_suggestions=factor_data.get("mitigation_suggestions", [])
-                )
-                risk_factors.append(risk_factor)
-            
-            return {
-                "factors": risk_factors,
-                "overall_score": risk_data.get("overall_risk_score", 0.5),
-                "category": RiskLevel(risk_data.get("risk_category", "moderate"))
-            }
+            return self._build_risk_assessment(risk_data)
             
         except Exception as e:
             logger.error(f"Risk assessment failed: {e}")
-            return {
-                "factors": [],
-                "overall_score": 0.5,
-                "category": RiskLevel.MODERATE
-            }
+            return self._default_risk_assessment()
 
     async def _gather_market_intelligence(
         self, 
@@ -445,10 +863,13 @@ class AdvancedAIAnalyzer:
             if analysis.document_type in [DocumentType.MARKET_ANALYSIS, DocumentType.BUSINESS_PLAN]:
                 market_data.update(analysis.extracted_data)
         
+        if not market_data:
+            return self._default_market_intelligence()
+        
         market_prompt = f"""
         Analyze the market intelligence for this investment proposal:
         
-        Market Data: {json.dumps(market_data, indent=2)}
+        Market Data: {orjson.dumps(market_data).decode()}
         
         Provide market intelligence analysis:
         {{
@@ -462,52 +883,211 @@ class AdvancedAIAnalyzer:
         """
         
         try:
-            response = self.claude_client.messages.create(
-                model="claude-3-opus-20240229",
+            market_data = await self._cached_claude_json(
+                model=PHASE_MODELS["market"],
+                prompt=market_prompt,
                 max_tokens=1500,
-                temperature=0.1,
-                messages=[{"role": "user", "content": market_prompt}]
+                temperature=0.1
             )
+            return self._build_market_intelligence(market_data)
             
-            market_data = self._parse_json_response(response.content[0].text)
+        except Exception as e:
+            logger.error(f"Market intelligence gathering failed: {e}")
+            return self._default_market_intelligence()
+
+    async def _perform_combined_assessment(
+        self, 
+        document_analyses: List[DocumentAnalysis], 
+        combined_data: Dict[str, Any],
+        proposal_id: str
+    ) -> Tuple[float, Dict[str, Any], MarketIntelligence]:
+        """Run consistency, risk and market analysis as a single fused Claude call"""
+        
+        # No extracted data means no basis for any of the three assessments
+        if not combined_data:
+            return (
+                1.0 if len(document_analyses) < 2 else 0.8,
+                self._default_risk_assessment(),
+                self._default_market_intelligence()
+            )
+        
+        assessment_prompt = self._combined_assessment_prompt(combined_data, document_analyses)
+        
+        try:
+            assessment = await self._cached_claude_json(
+                model=PHASE_MODELS["risk"],
+                prompt=assessment_prompt,
+                max_tokens=4500,
+                temperature=0.1,
+                stream=True
+            )
             
-            return MarketIntelligence(
-                market_size=market_data.get("market_size", "Unknown"),
-                growth_rate=market_data.get("growth_rate", "Unknown"),
-                competition_level=market_data.get("competition_level", "moderate"),
-                market_trends=market_data.get("market_trends", []),
-                opportunity_score=market_data.get("opportunity_score", 0.5),
-                timing_assessment=market_data.get("timing_assessment", "fair")
+            consistency = assessment.get("consistency") or {}
+            consistency_score = (
+                consistency.get("consistency_score", 0.8) if len(document_analyses) >= 2 else 1.0
             )
+            risk_assessment = self._build_risk_assessment(assessment.get("risk") or {})
+            market_intel = self._build_market_intelligence(assessment.get("market") or {})
+            
+            return consistency_score, risk_assessment, market_intel
             
         except Exception as e:
-            logger.error(f"Market intelligence gathering failed: {e}")
-            return MarketIntelligence(
-                market_size="Analysis unavailable",
-                growth_rate="Unknown",
-                competition_level="moderate",
-                market_trends=[],
-                opportunity_score=0.5,
-                timing_assessment="fair"
+            logger.error(f"Combined assessment failed for proposal {proposal_id}: {e}")
+            return (
+                1.0 if len(document_analyses) < 2 else 0.8,
+                self._default_risk_assessment(),
+                self._default_market_intelligence()
             )
 
-    async def _find_similar_projects(
+    def _combined_assessment_prompt(
         self, 
+        combined_data: Dict[str, Any], 
         document_analyses: List[DocumentAnalysis]
+    ) -> str:
+        """Build the fused consistency / risk / market prompt"""
+        
+        # Per-type slices for the consistency section
+        financial_data = []
+        market_data = []
+        team_data = []
+        
+        for analysis in document_analyses:
+            if analysis.document_type == DocumentType.FINANCIAL_PROJECTIONS:
+                financial_data.append(analysis.extracted_data)
+            elif analysis.document_type == DocumentType.MARKET_ANALYSIS:
+                market_data.append(analysis.extracted_data)
+            elif analysis.document_type == DocumentType.TEAM_BIOS:
+                team_data.append(analysis.extracted_data)
+        
+        return f"""
+        Perform three assessments of this investment proposal in one pass.
+        
+        Combined Data: {orjson.dumps(combined_data).decode()}
+        
+        Per-document data for the consistency check:
+        Financial Data: {orjson.dumps(financial_data).decode()}
+        Market Data: {orjson.dumps(market_data).decode()}
+        Team Data: {orjson.dumps(team_data).decode()}
+        
+        1. Consistency - score from 0.0 to 1.0 how consistent the documents are with each other
+           and identify any major inconsistencies.
+        2. Risk - analyze risks in these categories:
+           Market Risk (competition, market size, timing), Technology Risk (feasibility, scalability,
+           innovation), Team Risk (experience, completeness, execution capability), Financial Risk
+           (projections, funding, burn rate), Regulatory Risk (compliance, legal issues),
+           Operational Risk (execution, partnerships, scaling).
+        3. Market - market intelligence analysis based on the market and business plan data.
+        
+        Return a single JSON object:
+        {{
+            "consistency": {{
+                "consistency_score": 0.0-1.0,
+                "inconsistencies": ["list of issues"]
+            }},
+            "risk": {{
+                "risk_factors": [
+                    {{
+                        "category": "Market Risk",
+                        "description": "Specific risk description",
+                        "severity": "low|moderate|high|very_high",
+                        "likelihood": 0.0-1.0,
+                        "impact_score": 0.0-1.0,
+                        "mitigation_suggestions": ["suggestion1", "suggestion2"]
+                    }}
+                ]
+            }},
+            "market": {{
+                "market_size": "Size description with numbers",
+                "growth_rate": "Annual growth rate",
+                "competition_level": "low|moderate|high|very_high",
+                "market_trends": ["trend1", "trend2", "trend3"],
+                "opportunity_score": 0.0-1.0,
+                "timing_assessment": "excellent|good|fair|poor"
+            }}
+        }}
+        """
+
+    def _build_risk_assessment(self, risk_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a parsed risk response into the risk assessment dict"""
+        
+        # Convert to RiskFactor objects
+        risk_factors = []
+        for factor_data in risk_data.get("risk_factors", []):
+            risk_factor = RiskFactor(
+                category=factor_data.get("category", "Unknown"),
+                description=factor_data.get("description", ""),
+                severity=_SEVERITY_MAP.get(factor_data.get("severity", ""), _SEVERITY_DEFAULT),
+                likelihood=factor_data.get("likelihood", 0.5),
+                impact_score=factor_data.get("impact_score", 0.5),
+                mitigation_suggestions=factor_data.get("mitigation_suggestions", [])
+            )
+            risk_factors.append(risk_factor)
+        
+        # Overall score and category are computed here rather than asked of Claude
+        overall_score = _aggregate_risk(
+            np.fromiter((rf.likelihood for rf in risk_factors), dtype=np.float64, count=len(risk_factors)),
+            np.fromiter((rf.impact_score for rf in risk_factors), dtype=np.float64, count=len(risk_factors)),
+            np.fromiter((_SEVERITY_WEIGHTS[rf.severity] for rf in risk_factors), dtype=np.float64, count=len(risk_factors))
+        )
+        
+        return {
+            "factors": risk_factors,
+            "overall_score": overall_score,
+            "category": _risk_category(overall_score)
+        }
+
+    def _default_risk_assessment(self) -> Dict[str, Any]:
+        """Neutral risk assessment used when analysis fails"""
+        return {
+            "factors": [],
+            "overall_score": 0.5,
+            "category": RiskLevel.MODERATE
+        }
+
+    def _build_market_intelligence(self, market_data: Dict[str, Any]) -> MarketIntelligence:
+        """Convert a parsed market response into MarketIntelligence"""
+        return MarketIntelligence(
+            market_size=market_data.get("market_size", "Unknown"),
+            growth_rate=market_data.get("growth_rate", "Unknown"),
+            competition_level=market_data.get("competition_level", "moderate"),
+            market_trends=market_data.get("market_trends", []),
+            opportunity_score=market_data.get("opportunity_score", 0.5),
+            timing_assessment=market_data.get("timing_assessment", "fair")
+        )
+
+    def _default_market_intelligence(self) -> MarketIntelligence:
+        """Placeholder market intelligence used when analysis fails"""
+        return MarketIntelligence(
+            market_size="Analysis unavailable",
+            growth_rate="Unknown",
+            competition_level="moderate",
+            market_trends=[],
+            opportunity_score=0.5,
+            timing_assessment="fair"
+        )
+
+    async def _find_similar_projects(
+        self, 
+        document_analyses: List[DocumentAnalysis],
+        combined_data: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
         """Find and analyze similar historical projects"""
         
-        # This would integrate with a database of historical projects
-        # For now, we'll simulate with AI-generated comparable analysis
+        if not combined_data:
+            return []
         
-        combined_data = {}
-        for analysis in document_analyses:
-            combined_data.update(analysis.extracted_data)
+        # Look up real comparables in the local project index first
+        if len(self.project_index):
+            matches = self.project_index.search(combined_data)
+            if matches:
+                return matches
+        
+        # No index (or no overlap with it) - fall back to AI-generated comparable analysis
         
         comparison_prompt = f"""
         Based on this proposal data, generate analysis of 3-5 similar historical projects:
         
-        Proposal Data: {json.dumps(combined_data, indent=2)}
+        Proposal Data: {orjson.dumps(combined_data).decode()}
         
         For each comparable project, provide:
         {{
@@ -527,14 +1107,12 @@ class AdvancedAIAnalyzer:
         """
         
         try:
-            response = self.claude_client.messages.create(
-                model="claude-3-opus-20240229",
+            comparison_data = await self._cached_claude_json(
+                model=PHASE_MODELS["similar"],
+                prompt=comparison_prompt,
                 max_tokens=2000,
                 temperature=0.3,  # Slightly higher for creative comparison
-                messages=[{"role": "user", "content": comparison_prompt}]
             )
-            
-            comparison_data = self._parse_json_response(response.content[0].text)
             return comparison_data.get("similar_projects", [])
             
         except Exception as e:
@@ -581,15 +1159,14 @@ class AdvancedAIAnalyzer:
         """
         
         try:
-            response = self.claude_client.messages.create(
-                model="claude-3-opus-20240229",
+            return await self._cached_claude_json(
+                model=PHASE_MODELS["insights"],
+                prompt=insights_prompt,
                 max_tokens=2500,
                 temperature=0.1,
-                messages=[{"role": "user", "content": insights_prompt}]
+                stream=True
             )
             
-            return self._parse_json_response(response.content[0].text)
-            
         except Exception as e:
             logger.error(f"Advanced insights generation failed: {e}")
             return {
@@ -609,39 +1186,29 @@ class AdvancedAIAnalyzer:
     ) -> Tuple[float, str]:
         """Calculate overall investment score and recommendation"""
         
-        # Weighted scoring algorithm
-        weights = {
-            "market_opportunity": 0.25,
-            "team_quality": 0.20,
-            "financial_projections": 0.20,
-            "risk_profile": 0.15,
-            "competitive_position": 0.10,
-            "execution_capability": 0.10
-        }
-        
-        # Calculate component scores
-        scores = {}
-        
-        # Market opportunity score
-        scores["market_opportunity"] = market_intel.opportunity_score
-        
-        # Team quality score (from team document analysis)
-        team_scores = [a.confidence_score for a in document_analyses if a.document_type == DocumentType.TEAM_BIOS]
-        scores["team_quality"] = sum(team_scores) / len(team_scores) if team_scores else 0.5
+        # Team quality and financial projection scores in a single pass over the documents
+        team_sum = team_n = 0
+        fin_sum = fin_n = 0
+        for a in document_analyses:
+            if a.document_type == DocumentType.TEAM_BIOS:
+                team_sum += a.confidence_score
+                team_n += 1
+            elif a.document_type == DocumentType.FINANCIAL_PROJECTIONS:
+                fin_sum += a.confidence_score
+                fin_n += 1
         
-        # Financial projections score
-        financial_scores = [a.confidence_score for a in document_analyses if a.document_type == DocumentType.FINANCIAL_PROJECTIONS]
-        scores["financial_projections"] = sum(financial_scores) / len(financial_scores) if financial_scores else 0.5
-        
-        # Risk profile score (inverted - lower risk = higher score)
-        scores["risk_profile"] = 1.0 - risk_assessment["overall_score"]
-        
-        # Competitive position and execution capability
-        scores["competitive_position"] = 0.6  # Default based on analysis
-        scores["execution_capability"] = 0.6  # Default based on analysis
+        # Component scores, in _WEIGHTS order
+        scores = np.array([
+            market_intel.opportunity_score,
+            team_sum / team_n if team_n else 0.5,
+            fin_sum / fin_n if fin_n else 0.5,
+            1.0 - risk_assessment["overall_score"],  # Inverted - lower risk = higher score
+            0.6,  # Competitive position - default based on analysis
+            0.6   # Execution capability - default based on analysis
+        ])
         
         # Calculate weighted overall score
-        overall_score = sum(scores[key] * weights[key] for key in weights.keys())
+        overall_score = float(scores @ _WEIGHTS)
         
         # Generate investment recommendation
         if overall_score >= 0.8:
@@ -657,41 +1224,31 @@ class AdvancedAIAnalyzer:
         
         return overall_score, recommendation
 
+    def _combine_extracted_data(self, document_analyses: List[DocumentAnalysis]) -> Dict[str, Any]:
+        """Merge extracted data across documents, later documents winning on key clashes"""
+        combined_data = {}
+        for analysis in document_analyses:
+            combined_data |= analysis.extracted_data
+        return combined_data
+
     def _calculate_completeness_score(self, document_analyses: List[DocumentAnalysis]) -> float:
         """Calculate information completeness score based on document types"""
-        
-        required_docs = {
-            DocumentType.BUSINESS_PLAN,
-            DocumentType.FINANCIAL_PROJECTIONS,
-            DocumentType.MARKET_ANALYSIS,
-            DocumentType.TEAM_BIOS
-        }
-        
-        present_docs = {analysis.document_type for analysis in document_analyses}
-        completeness = len(present_docs.intersection(required_docs)) / len(required_docs)
-        
-        return completeness
-
-    def _parse_document_analysis_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse Claude's response for document analysis"""
-        return self._parse_json_response(response_text)
+        return _completeness_from_set(frozenset(analysis.document_type for analysis in document_analyses))
 
     def _parse_json_response(self, response_text: str) -> Dict[str, Any]:
         """Parse JSON from Claude's response with fallback handling"""
+        json_str = extract_json_block(response_text)
+        if json_str is None:
+            return {}
+        
         try:
-            # Try to find JSON in the response
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != 0:
-                json_str = response_text[start_idx:end_idx]
-                return json.loads(json_str)
-            else:
-                return {}
-                
-        except json.JSONDecodeError:
+            return orjson.loads(json_str)
+        except orjson.JSONDecodeError:
             logger.warning("Failed to parse JSON from Claude response")
             return {}
 
 # Export the main class
-__all__ = ['AdvancedAIAnalyzer', 'AdvancedAnalysisResult', 'DocumentType', 'RiskLevel']
\ No newline at end of file
+__all__ = [
+    'AdvancedAIAnalyzer', 'AdvancedAnalysisResult', 'DocumentRef', 'DocumentType', 'ProjectIndex', 'RiskLevel',
+    'PROMPT_CACHING_HEADERS', 'cached_system_prompt', 'call_claude_with_backoff'
+]
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+CF1 JSON Extraction
+Locates and parses the JSON object embedded in a Claude response
+"""
+
+import re
+from typing import Any, Dict, Optional
+
+import orjson
+
+# Code-fenced JSON block, e.g. ```json {...} ```
+_JSON_FENCE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+
+class JsonObjectScanner:
+    """Incremental brace matcher that finds the first complete JSON object in streamed text
+
+    Tracks depth from the first '{', ignoring braces inside strings, so a caller can stop
+    reading as soon as the object closes.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.start = -1
+        self.end = -1
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> bool:
+        """Append a chunk and return True once the first object is complete"""
+        self.text += chunk
+        text = self.text
+        if self.start == -1:
+            self.start = text.find('{', self._pos)
+            if self.start == -1:
+                self._pos = len(text)
+                return False
+            self._pos = self.start
+
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == '{':
+                self._depth += 1
+            elif ch == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    self.end = i + 1
+                    return True
+
+        self._pos = len(text)
+        return False
+
+    def block(self) -> Optional[str]:
+        """Text of the complete object, or None if it has not closed"""
+        if self.end == -1:
+            return None
+        return self.text[self.start:self.end]
+
+    def parse(self) -> Optional[Dict[str, Any]]:
+        """Deserialize the complete object, or None if it has not closed or is not valid JSON"""
+        block = self.block()
+        if block is None:
+            return None
+        try:
+            return orjson.loads(block)
+        except orjson.JSONDecodeError:
+            return None
+
+
+def extract_json_block(text: str) -> Optional[str]:
+    """Return the first JSON object in a Claude response, or None if there is none
+
+    Fenced blocks are preferred; otherwise a single scan runs from the first '{'
+    to its matching '}'.
+    """
+    fenced = _JSON_FENCE.search(text)
+    if fenced:
+        return fenced.group(1)
+
+    scanner = JsonObjectScanner()
+    scanner.feed(text)
+    return scanner.block()
+
+
+def extract_first_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Parse the first JSON object in a Claude response, or None if there is no valid one"""
+    block = extract_json_block(text)
+    if block is None:
+        return None
+    try:
+        return orjson.loads(block)
+    except orjson.JSONDecodeError:
+        return None
+
+
+__all__ = ['JsonObjectScanner', 'extract_json_block', 'extract_first_json_object']
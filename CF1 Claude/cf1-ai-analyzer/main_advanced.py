@@ -9,23 +9,34 @@ import hmac
 import json
 import logging
 import os
+import re
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Union
+from dataclasses import asdict, is_dataclass
+from typing import Dict, List, Optional, Tuple, Union
 
 import aiofiles
 import aiofiles.os
 import aiohttp
+import httpx
+import orjson
+import redis.asyncio as redis
 from fastapi import FastAPI, File, Form, HTTPException, UploadFile, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 import pymupdf
 import pdfplumber
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
+from asyncio_throttle import Throttler
 
 # Import our advanced analysis modules
-from advanced_analysis import AdvancedAIAnalyzer, DocumentType, AdvancedAnalysisResult
+from advanced_analysis import (
+    AdvancedAIAnalyzer, DocumentRef, DocumentType, AdvancedAnalysisResult,
+    PROMPT_CACHING_HEADERS, cached_system_prompt
+)
 from market_intelligence import MarketIntelligenceEngine
 
 # Configure logging
@@ -39,17 +50,107 @@ logger = logging.getLogger(__name__)
 CLAUDE_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 CF1_BACKEND_URL = os.getenv("CF1_BACKEND_URL", "http://localhost:3001")
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "cf1-ai-webhook-secret-key")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+CACHE_TTL = 3600 * 24  # 24 hours cache TTL
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+CLASSIFICATION_MODEL = os.getenv("CLAUDE_CLASSIFY_MODEL", "claude-3-haiku-20240307")  # Picking an enum doesn't need Opus
+CLASSIFICATION_TOKENS_PER_DOC = 16
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MiB reads when saving uploads
+TEMP_DIR = os.getenv("CF1_TMP_DIR", "/dev/shm/cf1_uploads")  # tmpfs keeps staged uploads off disk; see init_temp_dir
 SUPPORTED_FORMATS = {".pdf", ".txt", ".docx"}
+CONCURRENT_CLAUDE_CALLS = 3  # Rate limiting for Claude API
+PDF_WORKERS = min(os.cpu_count() or 1, 4)  # PyMuPDF gains little past four processes
+MIN_PDF_TEXT_CHARS = 50  # Below this PyMuPDF output is treated as empty and pdfplumber is tried
 
 if not CLAUDE_API_KEY:
     logger.error("ANTHROPIC_API_KEY environment variable not set")
     raise ValueError("ANTHROPIC_API_KEY is required")
 
 # Initialize clients
-claude_client = Anthropic(api_key=CLAUDE_API_KEY)
-advanced_analyzer = AdvancedAIAnalyzer(claude_client)
-market_engine = MarketIntelligenceEngine(claude_client)
+# HTTP/2 lets concurrent Claude calls share one pooled TLS connection instead of a handshake each
+claude_http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+    timeout=httpx.Timeout(600.0, connect=10.0)  # Fail fast on connect; long generations keep the SDK's 600s read budget
+)
+# Async so Claude calls never block the event loop; SDK retries are off because
+# call_claude_with_backoff retries under the shared semaphore and throttler
+claude_client = AsyncAnthropic(api_key=CLAUDE_API_KEY, http_client=claude_http_client, max_retries=0)
+claude_throttler = Throttler(rate_limit=CONCURRENT_CLAUDE_CALLS, period=1.0)
+advanced_analyzer = AdvancedAIAnalyzer(claude_client, throttler=claude_throttler, cache_ttl=CACHE_TTL)
+market_engine = MarketIntelligenceEngine(claude_client, throttler=claude_throttler)
+
+# Keyed once at import; each webhook signs with a copy instead of re-encoding the secret
+_HMAC_TEMPLATE = hmac.new(WEBHOOK_SECRET.encode(), b"", hashlib.sha256)
+
+# Initialize Redis client
+redis_client = None
+
+async def init_redis():
+    """Initialize Redis connection and share it with the analyzer's response cache"""
+    global redis_client
+    try:
+        redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+        # Test connection
+        await redis_client.ping()
+        logger.info("Redis connection established successfully")
+    except Exception as e:
+        logger.warning(f"Redis connection failed: {e}. Caching will be disabled.")
+        redis_client = None
+    advanced_analyzer.redis_client = redis_client
+
+async def close_redis():
+    """Close Redis connection"""
+    global redis_client
+    if redis_client:
+        await redis_client.close()
+        logger.info("Redis connection closed")
+
+# Shared webhook HTTP session so connections to the backend are kept alive across notifications
+_webhook_session: Optional[aiohttp.ClientSession] = None
+
+def get_webhook_session() -> aiohttp.ClientSession:
+    """Return the shared webhook session, creating it on first use"""
+    global _webhook_session
+    if _webhook_session is None or _webhook_session.closed:
+        _webhook_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+    return _webhook_session
+
+async def close_webhook_session():
+    """Close the shared webhook session"""
+    global _webhook_session
+    if _webhook_session and not _webhook_session.closed:
+        await _webhook_session.close()
+        logger.info("Webhook session closed")
+    _webhook_session = None
+
+def init_temp_dir():
+    """Create the upload staging directory once, falling back to the system temp dir if tmpfs isn't writable"""
+    global TEMP_DIR
+    for candidate in (TEMP_DIR, os.path.join(tempfile.gettempdir(), "cf1_uploads")):
+        try:
+            os.makedirs(candidate, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"Cannot use upload directory {candidate}: {e}")
+            continue
+        if os.access(candidate, os.W_OK):
+            TEMP_DIR = candidate
+            logger.info(f"Staging uploads in {TEMP_DIR}")
+            return
+    raise RuntimeError("No writable upload directory available")
+
+# PDF parsing is CPU-bound, so it runs in worker processes instead of on the event loop
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Return the PDF extraction process pool, creating it on first use"""
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return _pdf_pool
 
 # FastAPI app
 app = FastAPI(
@@ -95,65 +196,117 @@ class HealthResponse(BaseModel):
     claude_api_status: str
     advanced_features: List[str]
 
+_UNSAFE_PATH_CHARS = re.compile(r"[^\w-]")
+
+# Filename keywords per document type, checked in priority order; plain substrings
+# (no word boundaries) since names like "business_plan.pdf" join words with underscores
+_FILENAME_PATTERNS = [
+    (re.compile("business|plan|executive|summary"), DocumentType.BUSINESS_PLAN),
+    (re.compile("financial|projections|forecast|budget"), DocumentType.FINANCIAL_PROJECTIONS),
+    (re.compile("market|analysis|research"), DocumentType.MARKET_ANALYSIS),
+    (re.compile("team|bio|founder|leadership"), DocumentType.TEAM_BIOS),
+    (re.compile("legal|terms|contract|agreement"), DocumentType.LEGAL_DOCUMENTS),
+    (re.compile("technical|spec|architecture|product"), DocumentType.TECHNICAL_SPECS),
+    (re.compile("pitch|deck|presentation"), DocumentType.PITCH_DECK),
+]
+
+# Static classification rubric, sent as a cached system prompt
+CLASSIFICATION_INSTRUCTIONS = """
+Classify the type of each numbered document based on its filename and content.
+
+Return ONLY a JSON array of strings, no prose, where element i is the type of document i, each one of:
+business_plan, financial_projections, market_analysis, team_bios, legal_documents, technical_specs, pitch_deck, other
+"""
+
+_TYPE_MAPPING = {
+    "business_plan": DocumentType.BUSINESS_PLAN,
+    "financial_projections": DocumentType.FINANCIAL_PROJECTIONS,
+    "market_analysis": DocumentType.MARKET_ANALYSIS,
+    "team_bios": DocumentType.TEAM_BIOS,
+    "legal_documents": DocumentType.LEGAL_DOCUMENTS,
+    "technical_specs": DocumentType.TECHNICAL_SPECS,
+    "pitch_deck": DocumentType.PITCH_DECK
+}
+
+_JSON_ARRAY = re.compile(r"\[.*\]", re.DOTALL)
+
+def _classification_cache_key(content_snippet: str, filename: str) -> str:
+    return "doctype:" + hashlib.sha256((filename + content_snippet).encode()).hexdigest()
+
 # Document processing functions (enhanced)
-async def classify_document_type(content: str, filename: str) -> DocumentType:
-    """Automatically classify document type based on content and filename"""
-    
-    filename_lower = filename.lower()
-    content_lower = content.lower()[:2000]  # Check first 2000 chars
+async def classify_document_types_batch(items: List[Tuple[str, str]]) -> List[DocumentType]:
+    """Classify (content, filename) pairs, sending every document the fast paths can't resolve in one Claude call"""
+    doc_types: List[Optional[DocumentType]] = [None] * len(items)
+    snippets = [content.lower()[:2000] for content, _ in items]  # Check first 2000 chars
     
     # Filename-based classification
-    if any(term in filename_lower for term in ["business", "plan", "executive", "summary"]):
-        return DocumentType.BUSINESS_PLAN
-    elif any(term in filename_lower for term in ["financial", "projections", "forecast", "budget"]):
-        return DocumentType.FINANCIAL_PROJECTIONS
-    elif any(term in filename_lower for term in ["market", "analysis", "research"]):
-        return DocumentType.MARKET_ANALYSIS
-    elif any(term in filename_lower for term in ["team", "bio", "founder", "leadership"]):
-        return DocumentType.TEAM_BIOS
-    elif any(term in filename_lower for term in ["legal", "terms", "contract", "agreement"]):
-        return DocumentType.LEGAL_DOCUMENTS
-    elif any(term in filename_lower for term in ["technical", "spec", "architecture", "product"]):
-        return DocumentType.TECHNICAL_SPECS
-    elif any(term in filename_lower for term in ["pitch", "deck", "presentation"]):
-        return DocumentType.PITCH_DECK
+    for i, (_, filename) in enumerate(items):
+        filename_lower = filename.lower()
+        for pattern, doc_type in _FILENAME_PATTERNS:
+            if pattern.search(filename_lower):
+                doc_types[i] = doc_type
+                break
     
-    # Content-based classification using AI
-    classification_prompt = f"""
-    Classify this document type based on its content:
+    # Re-uploads of the same document reuse the earlier AI classification
+    pending = [i for i, doc_type in enumerate(doc_types) if doc_type is None]
+    cache_keys = {i: _classification_cache_key(snippets[i], items[i][1]) for i in pending}
+    if redis_client and pending:
+        try:
+            cached_types = await redis_client.mget([cache_keys[i] for i in pending])
+            for i, cached_type in zip(pending, cached_types):
+                if cached_type:
+                    doc_types[i] = DocumentType(cached_type)
+        except Exception as e:
+            logger.warning(f"Classification cache lookup failed: {e}")
+        pending = [i for i in pending if doc_types[i] is None]
     
-    Filename: {filename}
-    Content: {content_lower}
+    if not pending:
+        return doc_types
     
-    Return one of: business_plan, financial_projections, market_analysis, team_bios, legal_documents, technical_specs, pitch_deck, other
-    """
+    # Content-based classification using AI; only the documents vary between calls
+    classification_prompt = "\n\n".join(
+        f"Document {n}:\nFilename: {items[i][1]}\nContent: {snippets[i]}"
+        for n, i in enumerate(pending)
+    )
     
     try:
-        response = claude_client.messages.create(
-            model="claude-3-opus-20240229",
-            max_tokens=50,
+        response = await claude_client.messages.create(
+            model=CLASSIFICATION_MODEL,
+            max_tokens=CLASSIFICATION_TOKENS_PER_DOC * len(pending) + 8,  # An array of short type names, nothing more
             temperature=0,
-            messages=[{"role": "user", "content": classification_prompt}]
+            system=cached_system_prompt(CLASSIFICATION_INSTRUCTIONS),
+            messages=[{"role": "user", "content": classification_prompt}],
+            extra_headers=PROMPT_CACHING_HEADERS
         )
         
-        doc_type_str = response.content[0].text.strip().lower()
+        array_match = _JSON_ARRAY.search(response.content[0].text)
+        type_names = json.loads(array_match.group(0)) if array_match else []
+        if len(type_names) != len(pending):
+            raise ValueError(f"expected {len(pending)} classifications, got {len(type_names)}")
         
         # Map response to DocumentType enum
-        type_mapping = {
-            "business_plan": DocumentType.BUSINESS_PLAN,
-            "financial_projections": DocumentType.FINANCIAL_PROJECTIONS,
-            "market_analysis": DocumentType.MARKET_ANALYSIS,
-            "team_bios": DocumentType.TEAM_BIOS,
-            "legal_documents": DocumentType.LEGAL_DOCUMENTS,
-            "technical_specs": DocumentType.TECHNICAL_SPECS,
-            "pitch_deck": DocumentType.PITCH_DECK
-        }
-        
-        return type_mapping.get(doc_type_str, DocumentType.OTHER)
+        classified = {i: _TYPE_MAPPING.get(str(name).strip().lower(), DocumentType.OTHER) for i, name in zip(pending, type_names)}
         
     except Exception as e:
         logger.warning(f"Document classification failed: {e}")
-        return DocumentType.OTHER
+        return [doc_type or DocumentType.OTHER for doc_type in doc_types]
+    
+    if redis_client:
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for i, doc_type in classified.items():
+                    pipe.setex(cache_keys[i], CACHE_TTL, doc_type.value)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Classification cache storage failed: {e}")
+    
+    for i, doc_type in classified.items():
+        doc_types[i] = doc_type
+    return doc_types
+
+async def classify_document_type(content: str, filename: str) -> DocumentType:
+    """Automatically classify document type based on content and filename"""
+    return (await classify_document_types_batch([(content, filename)]))[0]
 
 async def extract_text_content(file_path: str, file_extension: str) -> str:
     """Extract text content from various file formats"""
@@ -172,34 +325,96 @@ async def extract_text_content(file_path: str, file_extension: str) -> str:
         logger.error(f"Error extracting text content: {e}")
         raise HTTPException(status_code=500, detail="Failed to extract document content")
 
+def _extract_pdf_sync(file_path: str) -> str:
+    """Extract PDF text with PyMuPDF, falling back to pdfplumber; top-level so it can run in the process pool"""
+    # Try PyMuPDF first. Opening by path is deliberate: MuPDF reads the file through a seekable
+    # stream on demand, while stream= wants bytes or a memoryview, so an mmap buys nothing here
+    with pymupdf.open(file_path) as doc:
+        text_content = "\n".join(page.get_text("text") for page in doc)
+    
+    if len(text_content.strip()) >= MIN_PDF_TEXT_CHARS:
+        return text_content
+    
+    # Fallback to pdfplumber when PyMuPDF found (next to) no text, e.g. for unusual encodings
+    with pdfplumber.open(file_path) as pdf:
+        return "".join(
+            page_text + "\n"
+            for page_text in (page.extract_text() for page in pdf.pages)
+            if page_text
+        )
+
 async def extract_pdf_content(file_path: str) -> str:
-    """Extract text content from PDF using PyMuPDF with pdfplumber fallback"""
+    """Extract text content from PDF in a worker process so parsing never blocks the event loop"""
     try:
-        # Try PyMuPDF first
-        doc = pymupdf.open(file_path)
-        text_content = ""
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text_content += page.get_text()
-        doc.close()
-        
-        if text_content.strip():
-            return text_content
-        
-        # Fallback to pdfplumber
-        with pdfplumber.open(file_path) as pdf:
-            text_content = ""
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_content += page_text + "\n"
-        
-        return text_content
+        return await asyncio.get_running_loop().run_in_executor(get_pdf_pool(), _extract_pdf_sync, file_path)
         
     except Exception as e:
         logger.error(f"PDF extraction failed: {e}")
         raise HTTPException(status_code=422, detail="Failed to extract text from PDF")
 
+async def extract_and_remove(file_path: str, file_extension: str) -> str:
+    """Extract an upload's text and delete the file right away; the text is all later stages need"""
+    try:
+        return await extract_text_content(file_path, file_extension)
+    finally:
+        try:
+            await aiofiles.os.remove(file_path)
+        except Exception as e:
+            logger.warning(f"Failed to cleanup file {file_path}: {e}")
+
+def canonical_document_hash(webhook_data: Dict) -> str:
+    """Hash the canonical transport form so receivers can rely on it for duplicate detection"""
+    return hashlib.sha256(json.dumps(webhook_data, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+async def process_basic_single_document(document: DocumentRef, proposal_id: str, webhook_url: str):
+    """Analyze one document with the lean analyzer path and deliver a basic-format webhook"""
+    start_time = time.time()
+    analysis_result = await advanced_analyzer.analyze_single_document(document, proposal_id)
+    document_analysis = analysis_result.document_analyses[0]
+    
+    webhook_data = {
+        "proposal_id": proposal_id,
+        "status": "completed",
+        "analysis_type": "basic",
+        "summary": document_analysis.content_summary,
+        "potential_strengths": [s["description"] for s in analysis_result.strengths_detailed],
+        "areas_for_consideration": [c["description"] for c in analysis_result.concerns_detailed],
+        "complexity_score": min(10, max(1, int(analysis_result.overall_score * 10))),
+        "processing_time_seconds": round(time.time() - start_time, 2),
+        "document_hash": "",  # Filled below from the canonical payload
+        "timestamp": analysis_result.analysis_timestamp
+    }
+    webhook_data["document_hash"] = canonical_document_hash(webhook_data)
+    
+    if not await send_webhook_notification(webhook_url, webhook_data):
+        logger.error(f"Failed to deliver basic analysis results for proposal {proposal_id}")
+
+async def remove_upload_dir(upload_dir: str):
+    """Remove a proposal's staging directory once empty; another upload for it may still be using it"""
+    try:
+        await aiofiles.os.rmdir(upload_dir)
+    except OSError:
+        pass
+
+async def extract_uploads(file_paths: List[str], file_extensions: List[str]) -> List[str]:
+    """Extract and delete every upload concurrently, then remove their staging directory
+    
+    Every extraction settles before the directory is removed, so one failure can't leave
+    the other files behind in it; the first error is re-raised afterwards.
+    """
+    try:
+        results = await asyncio.gather(*[
+            extract_and_remove(file_path, file_ext)
+            for file_path, file_ext in zip(file_paths, file_extensions)
+        ], return_exceptions=True)
+    finally:
+        await remove_upload_dir(os.path.dirname(file_paths[0]))
+    
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
 async def process_advanced_analysis_task(
     file_paths: List[str],
     file_extensions: List[str],
@@ -214,15 +429,19 @@ async def process_advanced_analysis_task(
     try:
         logger.info(f"Starting advanced analysis for proposal {proposal_id} with {len(file_paths)} documents")
         
-        # Extract and classify documents
+        # Extract documents concurrently, then classify them together in one call
+        contents = await extract_uploads(file_paths, file_extensions)
+        doc_types = await classify_document_types_batch(list(zip(contents, filenames)))
+        
         documents = []
-        for i, (file_path, file_ext, filename) in enumerate(zip(file_paths, file_extensions, filenames)):
-            content = await extract_text_content(file_path, file_ext)
-            doc_type = await classify_document_type(content, filename)
-            
-            documents.append((f"doc_{i}", content, doc_type))
+        for i, (content, doc_type, filename) in enumerate(zip(contents, doc_types, filenames)):
+            documents.append(DocumentRef(f"doc_{i}", content, doc_type))
             logger.info(f"Classified {filename} as {doc_type.value}")
         
+        if len(documents) == 1 and not (sector and target_market and business_model):
+            # Legacy single-document requests don't need the multi-document pipeline
+            return await process_basic_single_document(documents[0], proposal_id, webhook_url)
+        
         # Perform advanced analysis
         analysis_result = await advanced_analyzer.analyze_multiple_documents(
             documents, proposal_id
@@ -249,7 +468,7 @@ async def process_advanced_analysis_task(
             "areas_for_consideration": [c["description"] for c in analysis_result.concerns_detailed],
             "complexity_score": min(10, max(1, int(analysis_result.overall_score * 10))),
             "processing_time_seconds": 120,  # Estimated for advanced analysis
-            "document_hash": hashlib.sha256(str(analysis_result).encode()).hexdigest()[:16],
+            "document_hash": "",  # Filled below from the canonical payload
             "timestamp": analysis_result.analysis_timestamp,
             
             # Advanced features
@@ -268,7 +487,7 @@ async def process_advanced_analysis_task(
                         } for rf in analysis_result.risk_factors
                     ]
                 },
-                "market_intelligence": analysis_result.market_intelligence.__dict__ if hasattr(analysis_result.market_intelligence, '__dict__') else {},
+                "market_intelligence": asdict(analysis_result.market_intelligence) if is_dataclass(analysis_result.market_intelligence) else analysis_result.market_intelligence,
                 "success_probability": analysis_result.success_probability,
                 "similar_projects": analysis_result.similar_projects,
                 "recommendations": analysis_result.recommendations,
@@ -276,18 +495,13 @@ async def process_advanced_analysis_task(
             }
         }
         
+        webhook_data["document_hash"] = canonical_document_hash(webhook_data)
+        
         # Send enhanced webhook
         webhook_sent = await send_webhook_notification(webhook_url, webhook_data)
         
         if not webhook_sent:
             logger.error(f"Failed to deliver advanced analysis results for proposal {proposal_id}")
-        
-        # Cleanup files
-        for file_path in file_paths:
-            try:
-                await aiofiles.os.remove(file_path)
-            except Exception as e:
-                logger.warning(f"Failed to cleanup file {file_path}: {e}")
                 
     except Exception as e:
         logger.error(f"Advanced analysis task failed for proposal {proposal_id}: {e}")
@@ -312,12 +526,11 @@ async def process_advanced_analysis_task(
 async def send_webhook_notification(webhook_url: str, analysis_result: Dict) -> bool:
     """Send analysis results to CF1 backend via webhook"""
     try:
-        payload = json.dumps(analysis_result)
-        signature = hmac.new(
-            WEBHOOK_SECRET.encode(),
-            payload.encode(),
-            hashlib.sha256
-        ).hexdigest()
+        # orjson returns bytes, so the signature covers exactly what is sent
+        payload = orjson.dumps(analysis_result)
+        mac = _HMAC_TEMPLATE.copy()
+        mac.update(payload)
+        signature = mac.hexdigest()
         
         headers = {
             'Content-Type': 'application/json',
@@ -325,19 +538,18 @@ async def send_webhook_notification(webhook_url: str, analysis_result: Dict) ->
             'User-Agent': 'CF1-AI-Analyzer-Advanced/2.0'
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                webhook_url,
-                data=payload,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as response:
-                if response.status == 200:
-                    logger.info(f"Advanced webhook sent successfully for proposal {analysis_result['proposal_id']}")
-                    return True
-                else:
-                    logger.error(f"Advanced webhook failed with status {response.status}")
-                    return False
+        # Send webhook over the shared keep-alive session
+        async with get_webhook_session().post(
+            webhook_url,
+            data=payload,
+            headers=headers
+        ) as response:
+            if response.status == 200:
+                logger.info(f"Advanced webhook sent successfully for proposal {analysis_result['proposal_id']}")
+                return True
+            else:
+                logger.error(f"Advanced webhook failed with status {response.status}")
+                return False
                     
     except Exception as e:
         logger.error(f"Failed to send advanced webhook: {e}")
@@ -349,7 +561,7 @@ async def health_check():
     """Enhanced health check with advanced features status"""
     try:
         # Test Claude API
-        test_response = claude_client.messages.create(
+        test_response = await claude_client.messages.create(
             model="claude-3-opus-20240229",
             max_tokens=10,
             messages=[{"role": "user", "content": "test"}]
@@ -394,13 +606,10 @@ async def analyze_proposal_advanced(
         if len(files) > 10:
             raise HTTPException(status_code=400, detail="Maximum 10 files allowed")
         
-        # Validate and save files
-        file_paths = []
+        # Validate every upload before touching the filesystem; each extension is parsed once
         file_extensions = []
         filenames = []
         
-        os.makedirs("temp", exist_ok=True)
-        
         for i, file in enumerate(files):
             if not file.filename:
                 raise HTTPException(status_code=400, detail=f"File {i+1} has no filename")
@@ -412,26 +621,37 @@ async def analyze_proposal_advanced(
                     detail=f"Unsupported file format: {file_extension}. Supported: {', '.join(SUPPORTED_FORMATS)}"
                 )
             
-            # Check file size
-            file.file.seek(0, 2)
-            file_size = file.file.tell()
-            file.file.seek(0)
+            file_extensions.append(file_extension)
+            filenames.append(file.filename)
+        
+        # One staging subdirectory per proposal; the id is client-supplied, so keep it to a safe name
+        upload_dir = f"{TEMP_DIR}/{_UNSAFE_PATH_CHARS.sub('_', proposal_id)}"
+        await aiofiles.os.makedirs(upload_dir, exist_ok=True)
+        
+        file_paths = []
+        timestamp = int(time.time())
+        for i, (file, file_extension) in enumerate(zip(files, file_extensions)):
+            # Save file in chunks, enforcing the size limit as bytes arrive
+            file_path = f"{upload_dir}/{i}_{timestamp}{file_extension}"
+            file_size = 0
+            async with aiofiles.open(file_path, 'wb') as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if file_size > MAX_FILE_SIZE:
+                        break
+                    await f.write(chunk)
             
             if file_size > MAX_FILE_SIZE:
+                # The request is rejected as a whole, so drop the files saved so far too
+                for saved_path in file_paths + [file_path]:
+                    await aiofiles.os.remove(saved_path)
+                await remove_upload_dir(upload_dir)
                 raise HTTPException(
                     status_code=413,
                     detail=f"File {file.filename} too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB"
                 )
             
-            # Save file
-            file_path = f"temp/{proposal_id}_{i}_{int(time.time())}{file_extension}"
-            async with aiofiles.open(file_path, 'wb') as f:
-                content = await file.read()
-                await f.write(content)
-            
             file_paths.append(file_path)
-            file_extensions.append(file_extension)
-            filenames.append(file.filename)
         
         # Start advanced background processing
         background_tasks.add_task(
@@ -561,6 +781,28 @@ async def analyze_proposal_basic(
         files=[file]
     )
 
+# Application lifecycle events
+@app.on_event("startup")
+async def startup_event():
+    """Initialize connections on startup"""
+    logger.info("Starting CF1 AI Analyzer - Advanced...")
+    init_temp_dir()
+    get_pdf_pool()
+    await init_redis()
+    get_webhook_session()
+    logger.info("Startup complete - Claude response caching enabled" if redis_client else "Startup complete")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Cleanup connections on shutdown"""
+    logger.info("Shutting down CF1 AI Analyzer - Advanced...")
+    await close_redis()
+    await close_webhook_session()
+    await claude_client.close()
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(cancel_futures=True)
+    logger.info("Shutdown complete")
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -568,5 +810,8 @@ if __name__ == "__main__":
         "main_advanced:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        reload=bool(int(os.getenv("DEV_RELOAD", "0"))),  # Dev only; the reloader double-loads the app
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop="uvloop",
+        http="httptools"
     )
\ No newline at end of file
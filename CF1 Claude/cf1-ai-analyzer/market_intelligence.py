@@ -4,20 +4,39 @@ Real-time market data integration for enhanced AI analysis
 """
 
 import asyncio
-import json
+import contextlib
 import logging
-import time
-from datetime import datetime, timedelta
+import os
+import re
+from datetime import datetime
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 
 import aiohttp
 import numpy as np
-from anthropic import Anthropic
+from cachetools import TTLCache
+from anthropic import AsyncAnthropic
+
+from advanced_analysis import CLAUDE_CONCURRENCY, call_claude_with_backoff
+from json_extraction import extract_first_json_object
 
 logger = logging.getLogger(__name__)
 
+MARKET_CACHE_SIZE = int(os.getenv("CF1_MARKET_CACHE_SIZE", "1024"))
+# Leading number of a growth rate such as "45% YoY", " 80 %" or "80%/yr"
+_GROWTH_RE = re.compile(r"[-+]?\d*\.?\d+")
+
+# Real-time market score weights: market trends, economic conditions,
+# competitive landscape, sentiment, timing
+_WEIGHTS = np.array([0.25, 0.20, 0.25, 0.15, 0.15])
+_TIMING_SCORES = {
+    "excellent": 1.0,
+    "good": 0.8,
+    "fair": 0.6,
+    "poor": 0.3
+}
+
 class MarketDataSource(Enum):
     ALPHA_VANTAGE = "alpha_vantage"
     YAHOO_FINANCE = "yahoo_finance"
@@ -42,8 +61,17 @@ class CompetitorIntelligence:
     key_metrics: Dict[str, Any]
     competitive_advantages: List[str]
     recent_news: List[str]
+    growth_rate_pct: float = field(init=False)  # Numeric growth_rate, e.g. 45.0 for "45% YoY"
+    
+    def __post_init__(self):
+        match = _GROWTH_RE.search(str(self.growth_rate))
+        if match:
+            self.growth_rate_pct = float(match.group(0))
+        else:
+            logger.warning(f"Unparseable growth rate for {self.company_name}: {self.growth_rate!r}")
+            self.growth_rate_pct = 0.0
 
-@dataclass
+@dataclass(frozen=True)
 class EconomicIndicators:
     gdp_growth: float
     inflation_rate: float
@@ -52,12 +80,56 @@ class EconomicIndicators:
     sector_performance: Dict[str, float]
     risk_sentiment: str
 
+# Degraded-path results, built once and shared: the indicators are frozen and the
+# synthesis uses tuples, so callers get a fresh top-level dict but can't alter the defaults
+_FALLBACK_ECONOMIC_INDICATORS = EconomicIndicators(
+    gdp_growth=2.0, inflation_rate=3.0, interest_rates=5.0,
+    market_volatility=0.2, sector_performance={}, risk_sentiment="neutral"
+)
+_FALLBACK_SYNTHESIS = {
+    "market_opportunity_score": 0.6,
+    "competitive_intensity": "moderate",
+    "market_timing": "fair",
+    "growth_potential": "moderate",
+    "key_success_factors": ("Product differentiation", "Strong execution"),
+    "market_risks": ("Competitive pressure", "Market timing"),
+    "strategic_recommendations": ("Focus on unique value proposition",),
+    "optimal_positioning": "Differentiated player with strong execution",
+    "funding_environment": "neutral",
+    "exit_opportunities": ("acquisition",)
+}
+
+_PROMPT_LIST_SEPARATOR = "\n        "
+
+
+def _fmt_trends(market_trends: List[MarketTrend]) -> str:
+    """Market trends as prompt bullet lines"""
+    return _PROMPT_LIST_SEPARATOR.join(
+        f"- {t.trend_direction} {t.sector} (strength={t.strength:.2f})" for t in market_trends
+    )
+
+
+def _fmt_competitors(competitor_intel: List[CompetitorIntelligence]) -> str:
+    """Competitors as prompt bullet lines"""
+    return _PROMPT_LIST_SEPARATOR.join(
+        f"- {c.company_name} ({c.growth_rate} growth)" for c in competitor_intel
+    )
+
 class MarketIntelligenceEngine:
-    def __init__(self, claude_client: Anthropic, api_keys: Dict[str, str] = None):
+    def __init__(
+        self,
+        claude_client: AsyncAnthropic,
+        api_keys: Dict[str, str] = None,
+        cache_size: int = MARKET_CACHE_SIZE,
+        throttler=None
+    ):
         self.claude_client = claude_client
+        self._claude_sem = asyncio.Semaphore(CLAUDE_CONCURRENCY)
+        self._throttler = throttler or contextlib.nullcontext()
         self.api_keys = api_keys or {}
-        self.cache = {}
         self.cache_duration = 3600  # 1 hour cache
+        # Bounded so sector/market permutations can't grow it forever; entries expire on their own
+        self.cache: TTLCache = TTLCache(maxsize=cache_size, ttl=self.cache_duration)
         
     async def analyze_market_environment(
         self, 
@@ -70,11 +142,13 @@ class MarketIntelligenceEngine:
         logger.info(f"Analyzing market environment for sector: {sector}")
         
         try:
-            # Gather multiple data sources
-            market_trends = await self._get_sector_trends(sector)
-            economic_data = await self._get_economic_indicators()
-            competitor_intel = await self._get_competitor_intelligence(sector, target_market)
-            news_sentiment = await self._get_news_sentiment(sector)
+            # Gather multiple data sources concurrently; any failure still falls back as a whole
+            market_trends, economic_data, competitor_intel, news_sentiment = await asyncio.gather(
+                self._get_sector_trends(sector),
+                self._get_economic_indicators(),
+                self._get_competitor_intelligence(sector, target_market),
+                self._get_news_sentiment(sector)
+            )
             
             # Synthesize with AI analysis
             market_analysis = await self._synthesize_market_analysis(
@@ -100,8 +174,9 @@ class MarketIntelligenceEngine:
         """Get current trends for a specific sector"""
         
         cache_key = f"sector_trends_{sector}"
-        if self._is_cache_valid(cache_key):
-            return self.cache[cache_key]["data"]
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Mock implementation - in production, integrate with financial data APIs
         sector_mapping = {
@@ -126,15 +201,16 @@ class MarketIntelligenceEngine:
             )
             trends.append(trend)
         
-        self._cache_data(cache_key, trends)
+        self.cache[cache_key] = trends
         return trends
 
     async def _get_economic_indicators(self) -> EconomicIndicators:
         """Get current economic indicators"""
         
         cache_key = "economic_indicators"
-        if self._is_cache_valid(cache_key):
-            return self.cache[cache_key]["data"]
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Mock implementation - integrate with FRED, World Bank APIs
         indicators = EconomicIndicators(
@@ -152,7 +228,7 @@ class MarketIntelligenceEngine:
             risk_sentiment="cautious_optimism"
         )
         
-        self._cache_data(cache_key, indicators)
+        self.cache[cache_key] = indicators
         return indicators
 
     async def _get_competitor_intelligence(
@@ -163,8 +239,9 @@ class MarketIntelligenceEngine:
         """Get intelligence on key competitors in the sector"""
         
         cache_key = f"competitors_{sector}_{target_market}"
-        if self._is_cache_valid(cache_key):
-            return self.cache[cache_key]["data"]
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Mock competitor data - in production, integrate with Crunchbase, PitchBook APIs
         mock_competitors = [
@@ -212,15 +289,16 @@ class MarketIntelligenceEngine:
             )
         ]
         
-        self._cache_data(cache_key, mock_competitors)
+        self.cache[cache_key] = mock_competitors
         return mock_competitors
 
     async def _get_news_sentiment(self, sector: str) -> Dict[str, Any]:
         """Analyze news sentiment for the sector"""
         
         cache_key = f"news_sentiment_{sector}"
-        if self._is_cache_valid(cache_key):
-            return self.cache[cache_key]["data"]
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Mock sentiment analysis - integrate with news APIs and sentiment analysis
         sentiment_data = {
@@ -249,7 +327,7 @@ class MarketIntelligenceEngine:
             ]
         }
         
-        self._cache_data(cache_key, sentiment_data)
+        self.cache[cache_key] = sentiment_data
         return sentiment_data
 
     async def _synthesize_market_analysis(
@@ -271,7 +349,8 @@ class MarketIntelligenceEngine:
         Target Market: {target_market}
         Business Model: {business_model}
         
-        Market Trends: {[f"{t.trend_direction} {t.sector} trend (strength: {t.strength})" for t in market_trends]}
+        Market Trends:
+        {_fmt_trends(market_trends)}
         
         Economic Indicators:
         - GDP Growth: {economic_data.gdp_growth}%
@@ -279,7 +358,8 @@ class MarketIntelligenceEngine:
         - Interest Rates: {economic_data.interest_rates}%
         - Market Volatility: {economic_data.market_volatility}
         
-        Competitors: {[f"{c.company_name} ({c.growth_rate} growth)" for c in competitor_intel]}
+        Competitors:
+        {_fmt_competitors(competitor_intel)}
         
         News Sentiment: {news_sentiment['overall_sentiment']} (score: {news_sentiment['sentiment_score']})
         
@@ -299,11 +379,15 @@ class MarketIntelligenceEngine:
         """
         
         try:
-            response = self.claude_client.messages.create(
-                model="claude-3-opus-20240229",
-                max_tokens=2000,
-                temperature=0.1,
-                messages=[{"role": "user", "content": synthesis_prompt}]
+            response = await call_claude_with_backoff(
+                lambda: self.claude_client.messages.create(
+                    model="claude-3-opus-20240229",
+                    max_tokens=2000,
+                    temperature=0.1,
+                    messages=[{"role": "user", "content": synthesis_prompt}]
+                ),
+                self._claude_sem,
+                self._throttler
             )
             
             return self._parse_json_response(response.content[0].text)
@@ -322,17 +406,12 @@ class MarketIntelligenceEngine:
         try:
             market_env = await self.analyze_market_environment(sector, "enterprise", business_model)
             
-            # Weight different factors
-            weights = {
-                "market_trends": 0.25,
-                "economic_conditions": 0.20,
-                "competitive_landscape": 0.25,
-                "sentiment": 0.15,
-                "timing": 0.15
-            }
-            
             # Calculate component scores
-            trend_score = sum(t.strength for t in market_env["market_trends"]) / len(market_env["market_trends"])
+            market_trends = market_env["market_trends"]
+            if not market_trends:
+                logger.warning(f"No market trends for {sector}; using neutral market score")
+                return 0.6
+            trend_score = np.asarray([t.strength for t in market_trends]).mean()
             
             econ_score = self._calculate_economic_score(market_env["economic_indicators"])
             
@@ -342,16 +421,9 @@ class MarketIntelligenceEngine:
             
             timing_score = self._calculate_timing_score(market_env["ai_synthesis"])
             
-            # Calculate weighted score
-            market_score = (
-                trend_score * weights["market_trends"] +
-                econ_score * weights["economic_conditions"] +
-                comp_score * weights["competitive_landscape"] +
-                sentiment_score * weights["sentiment"] +
-                timing_score * weights["timing"]
-            )
-            
-            return min(max(market_score, 0.0), 1.0)  # Clamp to 0-1 range
+            # Weighted score, clamped to 0-1 range
+            scores = np.array([trend_score, econ_score, comp_score, sentiment_score, timing_score])
+            return float(np.clip(scores @ _WEIGHTS, 0.0, 1.0))
             
         except Exception as e:
             logger.error(f"Real-time market score calculation failed: {e}")
@@ -372,7 +444,7 @@ class MarketIntelligenceEngine:
             return 0.8  # No data, assume moderate
         
         # Lower competition intensity = higher score
-        avg_growth = sum(float(c.growth_rate.split('%')[0]) for c in competitors) / len(competitors)
+        avg_growth = np.fromiter((c.growth_rate_pct for c in competitors), float, len(competitors)).mean()
         
         # If average competitor growth is high, market is attractive but competitive
         if avg_growth > 100:
@@ -385,52 +457,20 @@ class MarketIntelligenceEngine:
     def _calculate_timing_score(self, ai_synthesis: Dict[str, Any]) -> float:
         """Calculate market timing score from AI synthesis"""
         timing = ai_synthesis.get("market_timing", "fair")
-        timing_scores = {
-            "excellent": 1.0,
-            "good": 0.8,
-            "fair": 0.6,
-            "poor": 0.3
-        }
-        return timing_scores.get(timing, 0.6)
-
-    def _is_cache_valid(self, cache_key: str) -> bool:
-        """Check if cached data is still valid"""
-        if cache_key not in self.cache:
-            return False
-        
-        cache_time = self.cache[cache_key]["timestamp"]
-        return (time.time() - cache_time) < self.cache_duration
-
-    def _cache_data(self, cache_key: str, data: Any) -> None:
-        """Cache data with timestamp"""
-        self.cache[cache_key] = {
-            "data": data,
-            "timestamp": time.time()
-        }
+        return _TIMING_SCORES.get(timing, 0.6)
 
     def _parse_json_response(self, response_text: str) -> Dict[str, Any]:
         """Parse JSON from Claude's response"""
-        try:
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != 0:
-                json_str = response_text[start_idx:end_idx]
-                return json.loads(json_str)
-            else:
-                return self._get_fallback_synthesis()
-                
-        except json.JSONDecodeError:
+        result = extract_first_json_object(response_text)
+        if result is None:
             return self._get_fallback_synthesis()
+        return result
 
     def _get_fallback_market_analysis(self, sector: str) -> Dict[str, Any]:
         """Fallback market analysis when data sources fail"""
         return {
             "market_trends": [],
-            "economic_indicators": EconomicIndicators(
-                gdp_growth=2.0, inflation_rate=3.0, interest_rates=5.0,
-                market_volatility=0.2, sector_performance={}, risk_sentiment="neutral"
-            ),
+            "economic_indicators": _FALLBACK_ECONOMIC_INDICATORS,
             "competitor_intelligence": [],
             "news_sentiment": {"overall_sentiment": "neutral", "sentiment_score": 0.5},
             "ai_synthesis": self._get_fallback_synthesis(),
@@ -440,18 +480,7 @@ class MarketIntelligenceEngine:
 
     def _get_fallback_synthesis(self) -> Dict[str, Any]:
         """Fallback AI synthesis when analysis fails"""
-        return {
-            "market_opportunity_score": 0.6,
-            "competitive_intensity": "moderate",
-            "market_timing": "fair",
-            "growth_potential": "moderate",
-            "key_success_factors": ["Product differentiation", "Strong execution"],
-            "market_risks": ["Competitive pressure", "Market timing"],
-            "strategic_recommendations": ["Focus on unique value proposition"],
-            "optimal_positioning": "Differentiated player with strong execution",
-            "funding_environment": "neutral",
-            "exit_opportunities": ["acquisition"]
-        }
+        return dict(_FALLBACK_SYNTHESIS)
 
 # Export main classes
 __all__ = ['MarketIntelligenceEngine', 'MarketTrend', 'CompetitorIntelligence', 'EconomicIndicators']
\ No newline at end of file
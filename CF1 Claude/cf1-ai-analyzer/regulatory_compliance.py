@@ -3,17 +3,41 @@ CF1 Regulatory Compliance Module
 Automated compliance checking and regulatory flagging for investment proposals
 """
 
-import json
+import asyncio
+import contextlib
+import hashlib
 import logging
+import os
+import re
+import tempfile
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Set, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Awaitable, Callable, Dict, List, Mapping, Optional, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
-from anthropic import Anthropic
+import numpy as np
+import orjson
+from anthropic import AsyncAnthropic
+
+from advanced_analysis import CLAUDE_CONCURRENCY, call_claude_with_backoff
+from json_extraction import JsonObjectScanner
 
 logger = logging.getLogger(__name__)
 
+COMPLIANCE_MODEL = "claude-3-opus-20240229"
+COMPLIANCE_CACHE_DIR = os.getenv("CF1_COMPLIANCE_CACHE_DIR", ".cache/compliance")
+FRAMEWORK_CACHE_TTL = 30 * 24 * 3600  # Framework selection rarely changes for the same offering
+ANALYSIS_CACHE_TTL = 7 * 24 * 3600  # Requirement checks and recommendations
+
+
+def _dumps(obj) -> str:
+    """Compact JSON for prompt payloads; indentation only costs tokens"""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 class ComplianceFramework(Enum):
     SEC_REG_CF = "sec_regulation_cf"  # SEC Regulation Crowdfunding
     SEC_REG_D = "sec_regulation_d"   # SEC Regulation D
@@ -64,10 +88,239 @@ class ComplianceReport:
     required_disclosures: List[str]
     regulatory_warnings: List[str]
 
+# Framework menu shown to Claude when selecting applicable frameworks
+_FRAMEWORK_DESCRIPTIONS = """
+        - sec_regulation_cf: SEC Regulation Crowdfunding (up to $5M, retail investors)
+        - sec_regulation_d: SEC Regulation D (accredited investors, private placement)
+        - sec_regulation_a: SEC Regulation A+ (up to $75M, public offering)
+        - eu_mifid: EU MiFID (European investors)
+        - cftc_derivatives: CFTC Derivatives (derivative instruments)
+        - bsa_aml: BSA/AML (anti-money laundering requirements)
+        - gdpr: GDPR (EU data protection)
+        - ccpa: CCPA (California privacy)""".strip()
+
+_ALL_CLEAR_RECOMMENDATION = "All critical compliance requirements appear to be met."
+
+# Offering size thresholds and inputs for rule-based framework selection
+REG_CF_LIMIT = 5_000_000
+REG_A_LIMIT = 75_000_000
+_OFFERING_AMOUNT_KEYS = ("offering_amount", "funding_goal", "target_amount", "amount")
+# A negated investor or offering category ("non-retail", "not accredited", "non-public") leaves the call to Claude
+_NEGATED_CATEGORY = re.compile(r"\b(?:non[- ]?|not\s+)(?:retail|accredited|institutional|qualified|public)\b")
+_EU_JURISDICTION = re.compile(r"\b(eu|europe|european union)\b", re.IGNORECASE)
+
+# Read-only quick-check recommendations, shared by every quick_compliance_check result
+SEC_REG_CF_TEMPLATE = MappingProxyType({
+    "applicable": True,
+    "description": "SEC Regulation Crowdfunding - suitable for retail investors up to $5M",
+    "key_requirements": (
+        "Use registered funding portal",
+        "Investor limits apply",
+        "Disclosure requirements",
+        "Annual reporting"
+    )
+})
+SEC_REG_D_TEMPLATE = MappingProxyType({
+    "applicable": True,
+    "description": "SEC Regulation D - for accredited investors",
+    "key_requirements": (
+        "Verify accredited status",
+        "File Form D",
+        "No general solicitation",
+        "Bad actor checks"
+    )
+})
+BSA_AML_TEMPLATE = MappingProxyType({
+    "applicable": True,
+    "description": "Bank Secrecy Act / Anti-Money Laundering requirements",
+    "key_requirements": (
+        "Customer identification",
+        "Suspicious activity monitoring",
+        "Transaction recordkeeping"
+    )
+})
+
+
+# Investor categories recognized in free-text investor types; "non-accredited" and
+# "not accredited" stay one token, so negated categories never match
+_INVESTOR_TOKENS = frozenset({"retail", "accredited", "institutional", "qualified"})
+_INVESTOR_TOKEN_RE = re.compile(r"(?:non[- ]?|not\s+)?[a-z]+")
+
+
+def _investor_tokens(investor_type: str) -> frozenset:
+    """Known investor categories mentioned in an investor type description"""
+    return _INVESTOR_TOKENS.intersection(_INVESTOR_TOKEN_RE.findall(investor_type.lower()))
+
+
+def _enum_or_default(enum_cls, value, default):
+    """Member of enum_cls for a Claude-supplied value, or default for an off-spec one"""
+    try:
+        return enum_cls(str(value).strip().lower())
+    except ValueError:
+        logger.warning(f"Unknown {enum_cls.__name__} value from Claude: {value!r}; using {default.value}")
+        return default
+
+
+@lru_cache(maxsize=1024)
+def _quick_rules(within_reg_cf_limit: bool, investor_tokens: frozenset) -> Mapping[str, Mapping[str, any]]:
+    """Quick-check recommendations for one offering-size bucket and set of investor categories"""
+    recommendations = {}
+    if within_reg_cf_limit and "retail" in investor_tokens:
+        recommendations["sec_reg_cf"] = SEC_REG_CF_TEMPLATE
+    if "accredited" in investor_tokens:
+        recommendations["sec_reg_d"] = SEC_REG_D_TEMPLATE
+    # Always include AML requirements
+    recommendations["bsa_aml"] = BSA_AML_TEMPLATE
+    return MappingProxyType(recommendations)
+
+# Static prompt bodies, filled with str.format per call; literal JSON braces are doubled
+_FRAMEWORK_DETECTION_TEMPLATE = """
+        Determine which regulatory frameworks apply to this investment offering:
+        
+        Business Description: {business_description}
+        Financial Details: {financial_details}
+        Target Investors: {target_investors}
+        Offering Structure: {offering_structure}
+        
+        Available frameworks:
+        """ + _FRAMEWORK_DESCRIPTIONS + """
+        
+        Return JSON: {{"applicable_frameworks": ["framework1", "framework2"]}}
+        """
+
+_FRAMEWORK_COMPLIANCE_TEMPLATE = """
+        Analyze compliance with {framework} requirements:
+        
+        Business Description: {business_description}
+        Financial Details: {financial_details}
+        Target Investors: {target_investors}
+        Offering Structure: {offering_structure}
+        Available Documents: {document_types}
+        
+        Requirements to check:
+        {requirements_json}
+        
+        For each requirement, assess compliance:
+        {{
+            "compliance_flags": [
+                {{
+                    "requirement_id": "requirement_id",
+                    "status": "compliant|non_compliant|needs_review|unclear",
+                    "risk_level": "low|medium|high|critical",
+                    "details": "Detailed assessment",
+                    "recommended_action": "Specific action needed",
+                    "regulatory_citation": "Relevant regulation section"
+                }}
+            ]
+        }}
+        """
+
+# Compliance score lookup tables: flag statuses and risk levels map to indices into
+# the per-status base score and the per-risk multiplier
+_STATUS_IDX = {
+    ComplianceLevel.COMPLIANT: 0,
+    ComplianceLevel.NEEDS_REVIEW: 1,
+    ComplianceLevel.UNCLEAR: 2,
+    ComplianceLevel.NON_COMPLIANT: 3,
+}
+_STATUS_SCORE = np.array([1.0, 0.7, 0.5, 0.0])
+_RISK_IDX = {
+    RiskLevel.LOW: 0,
+    RiskLevel.MEDIUM: 1,
+    RiskLevel.HIGH: 2,
+    RiskLevel.CRITICAL: 3,
+}
+_RISK_MULT = np.array([1.0, 1.0, 0.7, 0.5])
+_COMPLIANT_IDX = _STATUS_IDX[ComplianceLevel.COMPLIANT]
+_NEEDS_REVIEW_IDX = _STATUS_IDX[ComplianceLevel.NEEDS_REVIEW]
+_NON_COMPLIANT_IDX = _STATUS_IDX[ComplianceLevel.NON_COMPLIANT]
+_HIGH_RISK_IDX = _RISK_IDX[RiskLevel.HIGH]
+
+
+class FileCache:
+    """JSON-file cache of parsed Claude responses, so re-reviews of a proposal skip the API
+
+    Each entry is one {data, timestamp} file named by key; expired entries read as misses.
+    """
+    
+    def __init__(self, directory: str = COMPLIANCE_CACHE_DIR):
+        self.directory = directory
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+    
+    def _read(self, key: str, ttl: float) -> Optional[Dict[str, any]]:
+        try:
+            with open(self._path(key), "rb") as f:
+                entry = orjson.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("timestamp", 0) > ttl:
+            return None
+        return entry.get("data")
+    
+    def _write(self, key: str, data: Dict[str, any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        # Write then rename so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps({"data": data, "timestamp": time.time()}))
+        os.replace(tmp_path, self._path(key))
+    
+    async def get(self, key: str, ttl: float) -> Optional[Dict[str, any]]:
+        return await asyncio.to_thread(self._read, key, ttl)
+    
+    async def set(self, key: str, data: Dict[str, any]) -> None:
+        try:
+            await asyncio.to_thread(self._write, key, data)
+        except OSError as e:
+            logger.warning(f"Compliance cache write failed: {e}")
+    
+    async def get_or_compute(
+        self,
+        key: str,
+        ttl: float,
+        compute: Callable[[], Awaitable[Dict[str, any]]]
+    ) -> Dict[str, any]:
+        """Return the cached value for key, or compute it and cache it when non-empty"""
+        cached = await self.get(key, ttl)
+        if cached is not None:
+            return cached
+        data = await compute()
+        if data:
+            await self.set(key, data)
+        return data
+
 class RegulatoryComplianceEngine:
-    def __init__(self, claude_client: Anthropic):
+    def __init__(self, claude_client: AsyncAnthropic, cache: Optional[FileCache] = None, throttler=None):
         self.claude_client = claude_client
+        self.cache = cache or FileCache()
+        # Bounds the per-framework fan-out so it doesn't trip Claude rate limits
+        self._claude_sem = asyncio.Semaphore(CLAUDE_CONCURRENCY)
+        self._throttler = throttler or contextlib.nullcontext()
         self.compliance_requirements = self._load_compliance_requirements()
+        # Per-framework requirement_id -> requirement index for matching Claude's flags
+        self._requirement_index: Dict[ComplianceFramework, Dict[str, ComplianceRequirement]] = {
+            framework: {req.requirement_id: req for req in requirements}
+            for framework, requirements in self.compliance_requirements.items()
+        }
+        # The catalog is static, so serialize the prompt payloads once instead of per analysis
+        requirement_payloads = {
+            framework: [{
+                'id': req.requirement_id,
+                'description': req.description,
+                'mandatory': req.mandatory,
+                'category': req.category
+            } for req in requirements]
+            for framework, requirements in self.compliance_requirements.items()
+        }
+        self._requirements_json: Dict[ComplianceFramework, str] = {
+            framework: _dumps(payload)
+            for framework, payload in requirement_payloads.items()
+        }
+        self._requirements_catalog_json = _dumps({
+            framework.value: payload for framework, payload in requirement_payloads.items()
+        })
         
     def _load_compliance_requirements(self) -> Dict[ComplianceFramework, List[ComplianceRequirement]]:
         """Load regulatory compliance requirements for different frameworks"""
@@ -185,25 +438,35 @@ class RegulatoryComplianceEngine:
         logger.info(f"Starting compliance analysis for proposal {proposal_id}")
         
         try:
-            # Determine applicable regulatory frameworks
-            applicable_frameworks = await self._determine_applicable_frameworks(
-                business_description, financial_details, target_investors, offering_structure
+            # One Claude call selects frameworks, checks their requirements and recommends actions
+            fused = await self._analyze_compliance_fused(
+                business_description, financial_details, target_investors, offering_structure, documents
             )
             
-            # Analyze compliance for each framework
-            all_flags = []
-            for framework in applicable_frameworks:
-                framework_flags = await self._analyze_framework_compliance(
-                    framework, proposal_id, business_description, 
-                    financial_details, target_investors, offering_structure, documents
+            if fused is not None:
+                applicable_frameworks, all_flags, fused_recommendations = fused
+            else:
+                # Fall back to one call for framework selection, one per framework and one for recommendations
+                applicable_frameworks, all_flags = await self._analyze_compliance_per_framework(
+                    proposal_id, business_description, financial_details,
+                    target_investors, offering_structure, documents
                 )
-                all_flags.extend(framework_flags)
+            
+            partitions = self._partition_flags(all_flags)
+            high_priority_flags = partitions["high_priority"]
+            if not high_priority_flags:
+                recommendations = [_ALL_CLEAR_RECOMMENDATION]
+            elif fused is not None:
+                recommendations = fused_recommendations or [
+                    flag.recommended_action for flag in high_priority_flags if flag.recommended_action
+                ]
+            else:
+                recommendations = await self._generate_compliance_recommendations(high_priority_flags)
             
             # Generate overall assessment
             compliance_score = self._calculate_compliance_score(all_flags)
-            recommendations = await self._generate_compliance_recommendations(all_flags)
-            required_disclosures = self._extract_required_disclosures(all_flags)
-            regulatory_warnings = self._extract_regulatory_warnings(all_flags)
+            required_disclosures = self._extract_required_disclosures(partitions["disclosures"])
+            regulatory_warnings = self._extract_regulatory_warnings(partitions["warnings"])
             
             report = ComplianceReport(
                 proposal_id=proposal_id,
@@ -223,61 +486,248 @@ class RegulatoryComplianceEngine:
             logger.error(f"Compliance analysis failed for proposal {proposal_id}: {e}")
             raise
 
-    async def _determine_applicable_frameworks(
+    async def _analyze_compliance_fused(
         self,
         business_description: str,
         financial_details: Dict[str, any],
         target_investors: str,
-        offering_structure: Dict[str, any]
-    ) -> List[ComplianceFramework]:
-        """Determine which regulatory frameworks apply to this offering"""
+        offering_structure: Dict[str, any],
+        documents: List[Dict[str, str]]
+    ) -> Optional[Tuple[List[ComplianceFramework], List[ComplianceFlag], List[str]]]:
+        """Select frameworks, assess their requirements and draft recommendations in a single Claude call
+
+        Returns None when the call or its response is unusable, so the caller can fall back
+        to the per-framework path.
+        """
         
-        framework_prompt = f"""
-        Determine which regulatory frameworks apply to this investment offering:
+        fused_prompt = f"""
+        Perform a regulatory compliance review of this investment offering:
         
         Business Description: {business_description}
-        Financial Details: {json.dumps(financial_details, indent=2)}
+        Financial Details: {_dumps(financial_details)}
         Target Investors: {target_investors}
-        Offering Structure: {json.dumps(offering_structure, indent=2)}
+        Offering Structure: {_dumps(offering_structure)}
+        Available Documents: {[doc.get('type', 'unknown') for doc in documents]}
         
         Available frameworks:
-        - sec_regulation_cf: SEC Regulation Crowdfunding (up to $5M, retail investors)
-        - sec_regulation_d: SEC Regulation D (accredited investors, private placement)
-        - sec_regulation_a: SEC Regulation A+ (up to $75M, public offering)
-        - eu_mifid: EU MiFID (European investors)
-        - cftc_derivatives: CFTC Derivatives (derivative instruments)
-        - bsa_aml: BSA/AML (anti-money laundering requirements)
-        - gdpr: GDPR (EU data protection)
-        - ccpa: CCPA (California privacy)
+        {_FRAMEWORK_DESCRIPTIONS}
         
-        Return JSON: {{"applicable_frameworks": ["framework1", "framework2"]}}
+        Requirements catalog by framework:
+        {self._requirements_catalog_json}
+        
+        First decide which frameworks apply. Then assess every catalog requirement of the
+        selected frameworks only. Finally give prioritized recommendations for any high or
+        critical risk issues that are non-compliant or need review.
+        
+        Return JSON:
+        {{
+            "applicable_frameworks": ["framework1", "framework2"],
+            "compliance_flags": [
+                {{
+                    "requirement_id": "requirement_id",
+                    "status": "compliant|non_compliant|needs_review|unclear",
+                    "risk_level": "low|medium|high|critical",
+                    "details": "Detailed assessment",
+                    "recommended_action": "Specific action needed",
+                    "regulatory_citation": "Relevant regulation section"
+                }}
+            ],
+            "recommendations": ["recommendation1", "recommendation2"]
+        }}
         """
         
         try:
-            response = self.claude_client.messages.create(
-                model="claude-3-opus-20240229",
-                max_tokens=500,
-                temperature=0.1,
-                messages=[{"role": "user", "content": framework_prompt}]
-            )
+            result = await self._cached_claude_json(fused_prompt, max_tokens=4000, ttl=ANALYSIS_CACHE_TTL)
+            if "applicable_frameworks" not in result:
+                logger.warning("Fused compliance response had no framework selection")
+                return None
             
-            result = self._parse_json_response(response.content[0].text)
-            framework_names = result.get("applicable_frameworks", [])
+            frameworks = self._frameworks_from_names(result["applicable_frameworks"])
+            requirement_index = {}
+            for framework in frameworks:
+                requirement_index.update(self._requirement_index.get(framework, {}))
+            flags = self._build_flags(result.get("compliance_flags", []), requirement_index)
             
-            # Convert to enum values
-            frameworks = []
-            for name in framework_names:
-                try:
-                    framework = ComplianceFramework(name)
-                    frameworks.append(framework)
-                except ValueError:
-                    logger.warning(f"Unknown compliance framework: {name}")
+            return frameworks, flags, result.get("recommendations") or []
             
-            # Always include BSA/AML for financial offerings
-            if ComplianceFramework.BSA_AML not in frameworks:
-                frameworks.append(ComplianceFramework.BSA_AML)
+        except Exception as e:
+            logger.error(f"Fused compliance analysis failed: {e}")
+            return None
+
+    async def _analyze_compliance_per_framework(
+        self,
+        proposal_id: str,
+        business_description: str,
+        financial_details: Dict[str, any],
+        target_investors: str,
+        offering_structure: Dict[str, any],
+        documents: List[Dict[str, str]]
+    ) -> Tuple[List[ComplianceFramework], List[ComplianceFlag]]:
+        """Determine frameworks, then analyze each with its own Claude call"""
+        
+        # Determine applicable regulatory frameworks
+        applicable_frameworks = await self._determine_applicable_frameworks(
+            business_description, financial_details, target_investors, offering_structure
+        )
+        
+        # Analyze compliance for every framework concurrently - each is an independent Claude call
+        results = await asyncio.gather(*[
+            self._analyze_framework_compliance(
+                framework, proposal_id, business_description, 
+                financial_details, target_investors, offering_structure, documents
+            )
+            for framework in applicable_frameworks
+        ], return_exceptions=True)
+        
+        all_flags = []
+        for framework, result in zip(applicable_frameworks, results):
+            if isinstance(result, Exception):
+                logger.error(f"Framework compliance analysis failed for {framework.value}: {result}")
+            else:
+                all_flags.extend(result)
+        
+        return applicable_frameworks, all_flags
+
+    def _frameworks_from_names(self, framework_names: List[str]) -> List[ComplianceFramework]:
+        """Convert framework names to enum values, always including BSA/AML"""
+        frameworks = []
+        for name in framework_names:
+            try:
+                framework = ComplianceFramework(name)
+                frameworks.append(framework)
+            except ValueError:
+                logger.warning(f"Unknown compliance framework: {name}")
+        
+        # Always include BSA/AML for financial offerings
+        if ComplianceFramework.BSA_AML not in frameworks:
+            frameworks.append(ComplianceFramework.BSA_AML)
+        
+        return frameworks
+
+    def _rule_based_frameworks(
+        self,
+        financial_details: Dict[str, any],
+        target_investors: str,
+        offering_structure: Dict[str, any]
+    ) -> Optional[List[ComplianceFramework]]:
+        """Frameworks implied by offering size, investor type and jurisdiction
+        
+        Returns None unless the offering amount is known and the investor type maps to an
+        exemption, so ambiguous or negated offerings are still classified by Claude.
+        """
+        amount = self._offering_amount(financial_details, offering_structure)
+        if amount is None:
+            return None
+        
+        investors = (target_investors or "").lower()
+        offering_type = str(offering_structure.get("offering_type", "")).lower()
+        if _NEGATED_CATEGORY.search(investors) or _NEGATED_CATEGORY.search(offering_type):
+            return None
+        investor_tokens = _investor_tokens(investors)
+        
+        frameworks = []
+        if "retail" in investor_tokens and amount <= REG_CF_LIMIT:
+            frameworks.append(ComplianceFramework.SEC_REG_CF)
+        if amount <= REG_A_LIMIT and ("public" in investors or "public" in offering_type):
+            frameworks.append(ComplianceFramework.SEC_REG_A)
+        if "accredited" in investor_tokens:
+            frameworks.append(ComplianceFramework.SEC_REG_D)
+        if not frameworks:
+            return None
+        
+        jurisdiction = str(offering_structure.get("jurisdiction") or financial_details.get("jurisdiction") or "")
+        if _EU_JURISDICTION.search(jurisdiction):
+            frameworks.extend([ComplianceFramework.EU_MiFID, ComplianceFramework.GDPR])
+        
+        frameworks.append(ComplianceFramework.BSA_AML)
+        return frameworks
+
+    def _offering_amount(self, financial_details: Dict[str, any], offering_structure: Dict[str, any]) -> Optional[float]:
+        """First parseable offering amount, accepting numbers or strings such as $5,000,000"""
+        for details in (financial_details, offering_structure):
+            for key in _OFFERING_AMOUNT_KEYS:
+                value = details.get(key)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    return float(value)
+                if isinstance(value, str):
+                    try:
+                        return float(value.replace("$", "").replace(",", "").strip())
+                    except ValueError:
+                        continue
+        return None
+
+    def _build_flags(
+        self,
+        flag_data: List[Dict[str, any]],
+        requirement_index: Dict[str, ComplianceRequirement]
+    ) -> List[ComplianceFlag]:
+        """Convert parsed flag dicts into ComplianceFlag objects for known requirements"""
+        flags = []
+        for flag_info in flag_data:
+            if not isinstance(flag_info, dict):
+                continue
+            # Find the corresponding requirement
+            requirement = requirement_index.get(flag_info.get("requirement_id"))
             
+            if requirement:
+                flag = ComplianceFlag(
+                    requirement=requirement,
+                    status=_enum_or_default(ComplianceLevel, flag_info.get("status", "unclear"), ComplianceLevel.UNCLEAR),
+                    risk_level=_enum_or_default(RiskLevel, flag_info.get("risk_level", "medium"), RiskLevel.MEDIUM),
+                    details=flag_info.get("details", ""),
+                    recommended_action=flag_info.get("recommended_action", ""),
+                    regulatory_citation=flag_info.get("regulatory_citation")
+                )
+                flags.append(flag)
+        
+        return flags
+
+    def _partition_flags(self, flags: List[ComplianceFlag]) -> Dict[str, List[ComplianceFlag]]:
+        """Bucket flags for the report extractors in one pass
+        
+        - disclosures: disclosure-category requirements not yet compliant
+        - warnings: non-compliant at high or critical risk
+        - high_priority: non-compliant or needing review at high or critical risk
+        """
+        partitions = {"disclosures": [], "warnings": [], "high_priority": []}
+        for flag in flags:
+            status = _STATUS_IDX[flag.status]
+            if status == _COMPLIANT_IDX:
+                continue
+            if flag.requirement.category == "disclosure":
+                partitions["disclosures"].append(flag)
+            if _RISK_IDX[flag.risk_level] >= _HIGH_RISK_IDX:
+                if status == _NON_COMPLIANT_IDX:
+                    partitions["warnings"].append(flag)
+                    partitions["high_priority"].append(flag)
+                elif status == _NEEDS_REVIEW_IDX:
+                    partitions["high_priority"].append(flag)
+        return partitions
+
+    async def _determine_applicable_frameworks(
+        self,
+        business_description: str,
+        financial_details: Dict[str, any],
+        target_investors: str,
+        offering_structure: Dict[str, any]
+    ) -> List[ComplianceFramework]:
+        """Determine which regulatory frameworks apply to this offering"""
+        
+        # Clear-cut offerings don't need a Claude round-trip
+        frameworks = self._rule_based_frameworks(financial_details, target_investors, offering_structure)
+        if frameworks is not None:
             return frameworks
+        
+        framework_prompt = _FRAMEWORK_DETECTION_TEMPLATE.format(
+            business_description=business_description,
+            financial_details=_dumps(financial_details),
+            target_investors=target_investors,
+            offering_structure=_dumps(offering_structure)
+        )
+        
+        try:
+            result = await self._cached_claude_json(framework_prompt, max_tokens=500, ttl=FRAMEWORK_CACHE_TTL)
+            return self._frameworks_from_names(result.get("applicable_frameworks", []))
             
         except Exception as e:
             logger.error(f"Framework determination failed: {e}")
@@ -300,68 +750,19 @@ class RegulatoryComplianceEngine:
         if not requirements:
             return []
         
-        framework_prompt = f"""
-        Analyze compliance with {framework.value} requirements:
-        
-        Business Description: {business_description}
-        Financial Details: {json.dumps(financial_details, indent=2)}
-        Target Investors: {target_investors}
-        Offering Structure: {json.dumps(offering_structure, indent=2)}
-        Available Documents: {[doc.get('type', 'unknown') for doc in documents]}
-        
-        Requirements to check:
-        {json.dumps([{
-            'id': req.requirement_id,
-            'description': req.description,
-            'mandatory': req.mandatory,
-            'category': req.category
-        } for req in requirements], indent=2)}
-        
-        For each requirement, assess compliance:
-        {{
-            "compliance_flags": [
-                {{
-                    "requirement_id": "requirement_id",
-                    "status": "compliant|non_compliant|needs_review|unclear",
-                    "risk_level": "low|medium|high|critical",
-                    "details": "Detailed assessment",
-                    "recommended_action": "Specific action needed",
-                    "regulatory_citation": "Relevant regulation section"
-                }}
-            ]
-        }}
-        """
+        framework_prompt = _FRAMEWORK_COMPLIANCE_TEMPLATE.format(
+            framework=framework.value,
+            business_description=business_description,
+            financial_details=_dumps(financial_details),
+            target_investors=target_investors,
+            offering_structure=_dumps(offering_structure),
+            document_types=[doc.get('type', 'unknown') for doc in documents],
+            requirements_json=self._requirements_json[framework]
+        )
         
         try:
-            response = self.claude_client.messages.create(
-                model="claude-3-opus-20240229",
-                max_tokens=2000,
-                temperature=0.1,
-                messages=[{"role": "user", "content": framework_prompt}]
-            )
-            
-            result = self._parse_json_response(response.content[0].text)
-            flag_data = result.get("compliance_flags", [])
-            
-            # Convert to ComplianceFlag objects
-            flags = []
-            for flag_info in flag_data:
-                # Find the corresponding requirement
-                req_id = flag_info.get("requirement_id")
-                requirement = next((req for req in requirements if req.requirement_id == req_id), None)
-                
-                if requirement:
-                    flag = ComplianceFlag(
-                        requirement=requirement,
-                        status=ComplianceLevel(flag_info.get("status", "unclear")),
-                        risk_level=RiskLevel(flag_info.get("risk_level", "medium")),
-                        details=flag_info.get("details", ""),
-                        recommended_action=flag_info.get("recommended_action", ""),
-                        regulatory_citation=flag_info.get("regulatory_citation")
-                    )
-                    flags.append(flag)
-            
-            return flags
+            result = await self._cached_claude_json(framework_prompt, max_tokens=2000, ttl=ANALYSIS_CACHE_TTL)
+            return self._build_flags(result.get("compliance_flags", []), self._requirement_index[framework])
             
         except Exception as e:
             logger.error(f"Framework compliance analysis failed for {framework.value}: {e}")
@@ -373,84 +774,48 @@ class RegulatoryComplianceEngine:
         if not flags:
             return 0.5  # Neutral score if no flags
         
-        total_weight = 0
-        weighted_score = 0
+        count = len(flags)
+        mandatory = np.fromiter((flag.requirement.mandatory for flag in flags), bool, count)
+        status = np.fromiter((_STATUS_IDX[flag.status] for flag in flags), np.int8, count)
+        risk = np.fromiter((_RISK_IDX[flag.risk_level] for flag in flags), np.int8, count)
         
-        for flag in flags:
-            # Weight mandatory requirements higher
-            weight = 1.0 if flag.requirement.mandatory else 0.5
-            
-            # Score based on compliance level
-            if flag.status == ComplianceLevel.COMPLIANT:
-                score = 1.0
-            elif flag.status == ComplianceLevel.NEEDS_REVIEW:
-                score = 0.7
-            elif flag.status == ComplianceLevel.UNCLEAR:
-                score = 0.5
-            else:  # NON_COMPLIANT
-                score = 0.0
-            
-            # Adjust for risk level
-            if flag.risk_level == RiskLevel.CRITICAL:
-                score *= 0.5
-            elif flag.risk_level == RiskLevel.HIGH:
-                score *= 0.7
-            
-            weighted_score += score * weight
-            total_weight += weight
+        # Weight mandatory requirements higher; scale the status score down for high/critical risk
+        weights = np.where(mandatory, 1.0, 0.5)
+        scores = _STATUS_SCORE[status] * _RISK_MULT[risk]
         
-        return weighted_score / total_weight if total_weight > 0 else 0.5
+        return float((scores * weights).sum() / weights.sum())
 
-    async def _generate_compliance_recommendations(self, flags: List[ComplianceFlag]) -> List[str]:
-        """Generate actionable compliance recommendations"""
-        
-        high_priority_flags = [
-            flag for flag in flags 
-            if flag.status in [ComplianceLevel.NON_COMPLIANT, ComplianceLevel.NEEDS_REVIEW]
-            and flag.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]
-        ]
+    async def _generate_compliance_recommendations(self, high_priority_flags: List[ComplianceFlag]) -> List[str]:
+        """Generate actionable compliance recommendations for the high-priority flags"""
         
         if not high_priority_flags:
-            return ["All critical compliance requirements appear to be met."]
+            return [_ALL_CLEAR_RECOMMENDATION]
         
         recommendation_prompt = f"""
         Generate actionable compliance recommendations based on these compliance issues:
         
-        {json.dumps([{
+        {_dumps([{
             'requirement': flag.requirement.description,
             'status': flag.status.value,
             'risk': flag.risk_level.value,
             'details': flag.details,
             'action': flag.recommended_action
-        } for flag in high_priority_flags], indent=2)}
+        } for flag in high_priority_flags])}
         
         Provide prioritized recommendations as a JSON list:
         {{"recommendations": ["recommendation1", "recommendation2"]}}
         """
         
         try:
-            response = self.claude_client.messages.create(
-                model="claude-3-opus-20240229",
-                max_tokens=1000,
-                temperature=0.1,
-                messages=[{"role": "user", "content": recommendation_prompt}]
-            )
-            
-            result = self._parse_json_response(response.content[0].text)
+            result = await self._cached_claude_json(recommendation_prompt, max_tokens=1000, ttl=ANALYSIS_CACHE_TTL)
             return result.get("recommendations", [])
             
         except Exception as e:
             logger.error(f"Recommendation generation failed: {e}")
             return [flag.recommended_action for flag in high_priority_flags if flag.recommended_action]
 
-    def _extract_required_disclosures(self, flags: List[ComplianceFlag]) -> List[str]:
-        """Extract required regulatory disclosures"""
-        
-        disclosure_flags = [
-            flag for flag in flags 
-            if flag.requirement.category == "disclosure"
-            and flag.status != ComplianceLevel.COMPLIANT
-        ]
+    def _extract_required_disclosures(self, disclosure_flags: List[ComplianceFlag]) -> List[str]:
+        """Extract required regulatory disclosures from non-compliant disclosure flags"""
         
         disclosures = []
         for flag in disclosure_flags:
@@ -461,14 +826,8 @@ class RegulatoryComplianceEngine:
         
         return disclosures
 
-    def _extract_regulatory_warnings(self, flags: List[ComplianceFlag]) -> List[str]:
-        """Extract critical regulatory warnings"""
-        
-        warning_flags = [
-            flag for flag in flags 
-            if flag.risk_level in [RiskLevel.HIGH, RiskLevel.CRITICAL]
-            and flag.status == ComplianceLevel.NON_COMPLIANT
-        ]
+    def _extract_regulatory_warnings(self, warning_flags: List[ComplianceFlag]) -> List[str]:
+        """Extract critical regulatory warnings from high-risk non-compliant flags"""
         
         warnings = []
         for flag in warning_flags:
@@ -479,74 +838,77 @@ class RegulatoryComplianceEngine:
         
         return warnings
 
+    async def _cached_claude_json(self, prompt: str, max_tokens: int, ttl: float) -> Dict[str, any]:
+        """Ask Claude for JSON, reusing a cached parse of the same request when it is fresh enough"""
+        key = hashlib.sha256(f"{COMPLIANCE_MODEL}|{max_tokens}|0.1|{prompt}".encode()).hexdigest()
+        
+        return await self.cache.get_or_compute(key, ttl, lambda: self._claude_json_stream(prompt, max_tokens))
+
+    async def _claude_json_stream(self, prompt: str, max_tokens: int) -> Dict[str, any]:
+        """Stream Claude's reply and parse the JSON object as soon as it closes, dropping any tail"""
+        
+        async def _consume() -> JsonObjectScanner:
+            scanner = JsonObjectScanner()
+            async with self.claude_client.messages.stream(
+                model=COMPLIANCE_MODEL,
+                max_tokens=max_tokens,
+                temperature=0.1,
+                messages=[{"role": "user", "content": prompt}]
+            ) as stream:
+                async for text in stream.text_stream:
+                    if scanner.feed(text):
+                        # Leaving the context closes the connection, so the model stops generating
+                        break
+            return scanner
+        
+        scanner = await call_claude_with_backoff(_consume, self._claude_sem, self._throttler)
+        return self._parse_scanned_json(scanner)
+
     def _parse_json_response(self, response_text: str) -> Dict[str, any]:
         """Parse JSON from Claude's response"""
-        try:
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != 0:
-                json_str = response_text[start_idx:end_idx]
-                return json.loads(json_str)
-            else:
-                return {}
-                
-        except json.JSONDecodeError:
+        scanner = JsonObjectScanner()
+        scanner.feed(response_text)
+        return self._parse_scanned_json(scanner)
+
+    def _parse_scanned_json(self, scanner: JsonObjectScanner) -> Dict[str, any]:
+        result = scanner.parse()
+        if result is None:
             logger.warning("Failed to parse JSON from compliance analysis response")
             return {}
+        return result
 
     async def quick_compliance_check(
         self,
         offering_amount: float,
         investor_type: str,
         business_sector: str
-    ) -> Dict[str, any]:
-        """Quick compliance framework recommendation"""
-        
-        recommendations = {}
-        
-        # SEC Regulation CF check
-        if offering_amount <= 5_000_000 and "retail" in investor_type.lower():
-            recommendations["sec_reg_cf"] = {
-                "applicable": True,
-                "description": "SEC Regulation Crowdfunding - suitable for retail investors up to $5M",
-                "key_requirements": [
-                    "Use registered funding portal",
-                    "Investor limits apply",
-                    "Disclosure requirements",
-                    "Annual reporting"
-                ]
-            }
-        
-        # SEC Regulation D check
-        if "accredited" in investor_type.lower():
-            recommendations["sec_reg_d"] = {
-                "applicable": True,
-                "description": "SEC Regulation D - for accredited investors",
-                "key_requirements": [
-                    "Verify accredited status",
-                    "File Form D",
-                    "No general solicitation",
-                    "Bad actor checks"
-                ]
-            }
-        
-        # Always include AML requirements
-        recommendations["bsa_aml"] = {
-            "applicable": True,
-            "description": "Bank Secrecy Act / Anti-Money Laundering requirements",
-            "key_requirements": [
-                "Customer identification",
-                "Suspicious activity monitoring",
-                "Transaction recordkeeping"
-            ]
-        }
+    ) -> Mapping[str, Mapping[str, any]]:
+        """Quick compliance framework recommendation
         
-        return recommendations
+        The result is a cached read-only mapping shared between calls with the same inputs.
+        """
+        return _quick_rules(offering_amount <= REG_CF_LIMIT, _investor_tokens(investor_type))
+
+    def quick_compliance_check_batch(
+        self,
+        rows: List[Tuple[float, str, str]]
+    ) -> List[Mapping[str, Mapping[str, any]]]:
+        """quick_compliance_check for many (offering_amount, investor_type, business_sector) rows
+        
+        Amounts are bucketed in one NumPy comparison; rows with the same bucket and investor
+        categories share one cached read-only result, so output size is one reference per row.
+        """
+        amounts = np.fromiter((row[0] for row in rows), np.float64, len(rows))
+        within_reg_cf_limit = (amounts <= REG_CF_LIMIT).tolist()
+        return [
+            _quick_rules(within_limit, _investor_tokens(row[1]))
+            for within_limit, row in zip(within_reg_cf_limit, rows)
+        ]
 
 # Export main classes
 __all__ = [
     'RegulatoryComplianceEngine', 
+    'FileCache',
     'ComplianceReport', 
     'ComplianceFlag', 
     'ComplianceFramework',
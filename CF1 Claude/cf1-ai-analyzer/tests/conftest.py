@@ -0,0 +1,32 @@
+"""Shared pytest setup for the CF1 AI analyzer modules"""
+
+import os
+import sys
+
+import pytest
+
+# The service modules live next to this directory and are imported as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# main.py refuses to import without an API key; tests never reach the real API
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+
+class ByteEncoding:
+    """Offline stand-in for tiktoken's cl100k_base: one token per UTF-8 byte"""
+
+    def encode(self, text, disallowed_special=()):
+        return list(text.encode())
+
+    def decode(self, tokens):
+        return bytes(tokens).decode(errors="ignore")
+
+
+@pytest.fixture(autouse=True)
+def offline_tokenizer(monkeypatch):
+    """Keep the suite offline: tiktoken downloads its BPE file on first use"""
+    import advanced_analysis
+    import main
+
+    monkeypatch.setattr(advanced_analysis, "_get_tokenizer", ByteEncoding)
+    monkeypatch.setattr(main, "_get_encoding", ByteEncoding)
@@ -0,0 +1,197 @@
+"""Tests for the risk scoring and Claude response caching in advanced_analysis.py"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import pytest
+from anthropic import InternalServerError, RateLimitError
+
+from advanced_analysis import (
+    CLAUDE_MAX_RETRIES,
+    AdvancedAIAnalyzer,
+    DocumentType,
+    RiskLevel,
+    _SEVERITY_MAP,
+    _SEVERITY_WEIGHTS,
+    _aggregate_risk,
+    _risk_category,
+    call_claude_with_backoff,
+)
+
+
+class _FakeRedis:
+    """Minimal async get/set store"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+class _FakeClaude:
+    """AsyncAnthropic stand-in whose messages.create returns each reply text in turn"""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.requests = []
+        self.messages = SimpleNamespace(create=self._create)
+
+    async def _create(self, **kwargs):
+        self.requests.append(kwargs)
+        return SimpleNamespace(content=[SimpleNamespace(text=self.replies.pop(0))])
+
+
+@pytest.fixture
+def analyzer():
+    return AdvancedAIAnalyzer(claude_client=None)
+
+
+@pytest.mark.parametrize("level", list(RiskLevel))
+def test_every_risk_level_has_a_severity_weight(level):
+    assert _SEVERITY_WEIGHTS[level] > 0
+
+
+def test_severity_weights_increase_with_severity():
+    weights = [_SEVERITY_WEIGHTS[level] for level in RiskLevel]
+    assert weights == sorted(weights)
+
+
+@pytest.mark.parametrize("severity", [level.value for level in RiskLevel])
+def test_build_risk_assessment_accepts_every_severity(analyzer, severity):
+    risk_data = {"risk_factors": [{"severity": severity, "likelihood": 1.0, "impact_score": 1.0}]}
+
+    assessment = analyzer._build_risk_assessment(risk_data)
+
+    assert assessment["factors"][0].severity is _SEVERITY_MAP[severity]
+    assert assessment["overall_score"] == pytest.approx(min(_SEVERITY_WEIGHTS[_SEVERITY_MAP[severity]], 1.0))
+    assert assessment["category"] is _risk_category(assessment["overall_score"])
+
+
+def test_build_risk_assessment_defaults_unknown_severity(analyzer):
+    assessment = analyzer._build_risk_assessment({"risk_factors": [{"severity": "catastrophic"}]})
+
+    assert assessment["factors"][0].severity is RiskLevel.MODERATE
+    assert assessment["overall_score"] == pytest.approx(0.25)
+
+
+def test_build_risk_assessment_without_factors_is_neutral(analyzer):
+    assessment = analyzer._build_risk_assessment({})
+
+    assert assessment["factors"] == []
+    assert assessment["overall_score"] == 0.5
+    assert assessment["category"] is RiskLevel.HIGH
+
+
+def test_aggregate_risk_is_mean_of_weighted_products():
+    score = _aggregate_risk(np.array([0.5, 1.0]), np.array([0.4, 0.2]), np.array([1.0, 2.0]))
+    assert score == pytest.approx((0.2 + 0.4) / 2)
+
+
+def test_aggregate_risk_is_clipped():
+    assert _aggregate_risk(np.array([1.0]), np.array([1.0]), np.array([2.0])) == 1.0
+
+
+@pytest.mark.parametrize("score, level", [
+    (0.0, RiskLevel.LOW),
+    (0.2, RiskLevel.MODERATE),
+    (0.4, RiskLevel.HIGH),
+    (0.59, RiskLevel.HIGH),
+    (0.6, RiskLevel.VERY_HIGH),
+])
+def test_risk_category_thresholds(score, level):
+    assert _risk_category(score) is level
+
+
+@pytest.mark.asyncio
+async def test_unparseable_claude_reply_is_not_cached():
+    client = _FakeClaude(['Sorry, the output was cut off: {"summary": "A', '{"summary": "A plan"}'])
+    redis = _FakeRedis()
+    analyzer = AdvancedAIAnalyzer(claude_client=client, redis_client=redis)
+    request = dict(model="claude-3-5-sonnet-20241022", prompt="Summarize", max_tokens=100, temperature=0.1)
+
+    assert await analyzer._cached_claude_json(**request) == {}
+    assert redis.store == {}
+
+    assert await analyzer._cached_claude_json(**request) == {"summary": "A plan"}
+    assert await analyzer._cached_claude_json(**request) == {"summary": "A plan"}
+    assert len(client.requests) == 2
+    assert len(redis.store) == 1
+
+
+@pytest.mark.asyncio
+async def test_unparseable_document_analysis_is_retried():
+    client = _FakeClaude(["not json", '{"summary": "A plan", "confidence_score": 0.9}'])
+    redis = _FakeRedis()
+    analyzer = AdvancedAIAnalyzer(claude_client=client, redis_client=redis)
+
+    empty = await analyzer._get_or_compute_doc_analysis("doc-1", "short plan", DocumentType.BUSINESS_PLAN)
+    assert empty.content_summary == ""
+    assert redis.store == {}
+
+    analysis = await analyzer._get_or_compute_doc_analysis("doc-1", "short plan", DocumentType.BUSINESS_PLAN)
+    assert analysis.content_summary == "A plan"
+    assert len(client.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_document_analysis_is_cached_by_content():
+    client = _FakeClaude(['{"summary": "A plan", "confidence_score": 0.9}'])
+    redis = _FakeRedis()
+    analyzer = AdvancedAIAnalyzer(claude_client=client, redis_client=redis)
+
+    first = await analyzer._get_or_compute_doc_analysis("doc-1", "short plan", DocumentType.BUSINESS_PLAN)
+    second = await analyzer._get_or_compute_doc_analysis("doc-2", "short plan", DocumentType.BUSINESS_PLAN)
+
+    assert len(client.requests) == 1
+    assert second.document_id == "doc-2"
+    assert second.content_summary == first.content_summary == "A plan"
+
+
+def _api_error(error_cls, status):
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    return error_cls("error", response=httpx.Response(status, request=request), body=None)
+
+
+@pytest.fixture
+def no_backoff_sleep(monkeypatch):
+    async def sleep(delay):
+        pass
+
+    monkeypatch.setattr("advanced_analysis.asyncio.sleep", sleep)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [
+    _api_error(RateLimitError, 429),
+    _api_error(InternalServerError, 529),
+])
+async def test_call_claude_with_backoff_retries_transient_errors(no_backoff_sleep, error):
+    outcomes = [error, "ok"]
+
+    async def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert await call_claude_with_backoff(call, asyncio.Semaphore(1)) == "ok"
+    assert outcomes == []
+
+
+@pytest.mark.asyncio
+async def test_call_claude_with_backoff_gives_up(no_backoff_sleep):
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise _api_error(InternalServerError, 500)
+
+    with pytest.raises(InternalServerError):
+        await call_claude_with_backoff(call, asyncio.Semaphore(1))
+    assert len(attempts) == CLAUDE_MAX_RETRIES
@@ -0,0 +1,67 @@
+"""Tests for the Claude response JSON helpers in json_extraction.py"""
+
+import pytest
+
+from json_extraction import JsonObjectScanner, extract_first_json_object, extract_json_block
+
+
+def test_scanner_completes_across_split_chunks():
+    scanner = JsonObjectScanner()
+    chunks = ['Here is the analysis: {"a": {"b"', ': [1, 2]', '}, "c": 3}', ' trailing text']
+
+    done = [scanner.feed(chunk) for chunk in chunks[:3]]
+
+    assert done == [False, False, True]
+    assert scanner.parse() == {"a": {"b": [1, 2]}, "c": 3}
+
+
+def test_scanner_ignores_braces_inside_strings():
+    scanner = JsonObjectScanner()
+
+    assert scanner.feed('{"text": "a } brace { and \\"quoted }\\"", ') is False
+    assert scanner.feed('"n": 1}') is True
+    assert scanner.parse() == {"text": 'a } brace { and "quoted }"', "n": 1}
+
+
+def test_scanner_handles_escape_split_between_chunks():
+    scanner = JsonObjectScanner()
+
+    assert scanner.feed('{"s": "x\\') is False
+    assert scanner.feed('"}"}') is True
+    assert scanner.parse() == {"s": 'x"}'}
+
+
+def test_scanner_unclosed_object_parses_to_none():
+    scanner = JsonObjectScanner()
+
+    assert scanner.feed('{"a": {"b": 1}') is False
+    assert scanner.parse() is None
+
+
+def test_scanner_invalid_object_parses_to_none():
+    scanner = JsonObjectScanner()
+
+    assert scanner.feed("{not json}") is True
+    assert scanner.parse() is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('```json\n{"a": 1}\n```', {"a": 1}),
+    ('prefix {"a": "}"} {"b": 2}', {"a": "}"}),
+    ('{not json}', None),
+    ("no object here", None),
+])
+def test_extract_first_json_object(text, expected):
+    assert extract_first_json_object(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('```json\n{"a": 1}\n```', '{"a": 1}'),
+    ('Result: {"a": {"b": "}"}} and {"c": 2}', '{"a": {"b": "}"}}'),
+    ('{"s": "escaped \\" quote }"}', '{"s": "escaped \\" quote }"}'),
+    ('{"unclosed": 1', None),
+    ('Note {x}: ```json\n{"a": 1}\n```', '{"a": 1}'),
+    ("no json", None),
+])
+def test_extract_json_block(text, expected):
+    assert extract_json_block(text) == expected
@@ -0,0 +1,208 @@
+"""Tests for the Claude call helper in main.py"""
+
+from types import SimpleNamespace
+
+import aiohttp
+import httpx
+import pytest
+from anthropic import InternalServerError, RateLimitError
+
+import main
+
+
+class _RawResponse:
+    """Stand-in for anthropic 0.39's LegacyAPIResponse, whose parse() is synchronous"""
+
+    def __init__(self, message, headers=None):
+        self._message = message
+        self.headers = httpx.Headers(headers or {})
+
+    def parse(self):
+        return self._message
+
+
+def _rate_limit_error(retry_after="0"):
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+def _server_error():
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(529, request=request)
+    return InternalServerError("overloaded", response=response, body=None)
+
+
+def _stub_client(monkeypatch, outcomes):
+    """Point main at a client whose raw create() yields each outcome in turn"""
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    client = SimpleNamespace(messages=SimpleNamespace(with_raw_response=SimpleNamespace(create=create)))
+    monkeypatch.setattr(main, "claude_client", client)
+    monkeypatch.setattr(main, "claude_rate_limiter", main.ClaudeRateLimiter(600))
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_create_claude_message_returns_parsed_message(monkeypatch):
+    message = object()
+    calls = _stub_client(monkeypatch, [_RawResponse(message)])
+
+    result = await main.create_claude_message(model="claude-3-opus-20240229", max_tokens=10, messages=[])
+
+    assert result is message
+    assert calls == [{"model": "claude-3-opus-20240229", "max_tokens": 10, "messages": []}]
+
+
+@pytest.mark.asyncio
+async def test_create_claude_message_syncs_limiter_from_headers(monkeypatch):
+    _stub_client(monkeypatch, [_RawResponse("ok", {"anthropic-ratelimit-requests-remaining": "3"})])
+
+    await main.create_claude_message(messages=[])
+
+    assert main.claude_rate_limiter.tokens <= 3
+
+
+@pytest.mark.asyncio
+async def test_create_claude_message_retries_rate_limits(monkeypatch):
+    calls = _stub_client(monkeypatch, [_rate_limit_error(), _RawResponse("ok")])
+
+    assert await main.create_claude_message(messages=[]) == "ok"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_create_claude_message_retries_server_errors(monkeypatch):
+    calls = _stub_client(monkeypatch, [_server_error(), _RawResponse("ok")])
+    monkeypatch.setattr(main.random, "uniform", lambda a, b: 0)
+
+    assert await main.create_claude_message(messages=[]) == "ok"
+    assert len(calls) == 2
+
+
+def test_claude_client_leaves_retries_to_the_rate_limiter():
+    assert main.claude_client.max_retries == 0
+
+
+@pytest.mark.asyncio
+async def test_create_claude_message_gives_up_after_max_attempts(monkeypatch):
+    errors = [_rate_limit_error() for _ in range(main.CLAUDE_MAX_ATTEMPTS)]
+    calls = _stub_client(monkeypatch, errors)
+
+    with pytest.raises(RateLimitError):
+        await main.create_claude_message(messages=[])
+    assert len(calls) == main.CLAUDE_MAX_ATTEMPTS
+
+
+@pytest.mark.asyncio
+async def test_chunk_content_keeps_short_content_whole():
+    assert await main.chunk_content("one paragraph", max_tokens=100) == ["one paragraph"]
+
+
+@pytest.mark.asyncio
+async def test_chunk_content_splits_on_paragraphs_within_the_token_limit():
+    paragraphs = [f"Paragraph {i} " + "x" * 40 for i in range(6)]
+
+    chunks = await main.chunk_content("\n\n".join(paragraphs), max_tokens=120, overlap_tokens=0)
+
+    assert len(chunks) > 1
+    assert all(main._count_tokens(chunk) <= 120 for chunk in chunks)
+    assert [p for chunk in chunks for p in chunk.split("\n\n")] == paragraphs
+
+
+class _FakeRedis:
+    """Minimal async get/setex store"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+
+
+def _analysis(proposal_id):
+    return {
+        "proposal_id": proposal_id,
+        "status": "completed",
+        "summary": "A plan",
+        "potential_strengths": [],
+        "areas_for_consideration": [],
+        "complexity_score": 5,
+        "processing_time_seconds": 1.0,
+        "document_hash": "abc",
+        "timestamp": "2024-01-01T00:00:00+00:00",
+    }
+
+
+@pytest.mark.asyncio
+async def test_pdf_cache_hit_skips_extraction_and_claude(monkeypatch, tmp_path):
+    pdf = tmp_path / "deck.pdf"
+    pdf.write_bytes(b"%PDF-1.4 test")
+    monkeypatch.setattr(main, "redis_client", _FakeRedis())
+    extracted = []
+    analyzed = []
+
+    async def extract_pdf_pages(file_path):
+        extracted.append(file_path)
+        yield "short text"
+
+    async def analyze_with_claude_raw(content, proposal_id):
+        analyzed.append(content)
+        return _analysis(proposal_id)
+
+    monkeypatch.setattr(main, "extract_pdf_pages", extract_pdf_pages)
+    monkeypatch.setattr(main, "analyze_with_claude_raw", analyze_with_claude_raw)
+
+    first = await main.analyze_pdf_with_claude(str(pdf), "proposal-1")
+    second = await main.analyze_pdf_with_claude(str(pdf), "proposal-2")
+
+    assert first["summary"] == "A plan"
+    assert second.summary == "A plan"
+    assert second.proposal_id == "proposal-2"
+    assert len(extracted) == 1
+    assert len(analyzed) == 1
+
+
+def _stub_lookups(monkeypatch):
+    """Make the underlying threaded lookup return immediately, recording each host resolved"""
+    resolved = []
+
+    async def resolve(self, host, port=0, family=0):
+        resolved.append(host)
+        return [{"host": host, "port": port}]
+
+    monkeypatch.setattr(aiohttp.ThreadedResolver, "resolve", resolve)
+    return resolved
+
+
+@pytest.mark.asyncio
+async def test_prewarming_resolver_shares_lookups_for_a_host(monkeypatch):
+    resolved = _stub_lookups(monkeypatch)
+    resolver = main.PrewarmingResolver()
+
+    await resolver.resolve("hooks.example.com", 443)
+    await resolver.resolve("hooks.example.com", 443)
+
+    assert resolved == ["hooks.example.com"]
+
+
+@pytest.mark.asyncio
+async def test_prewarming_resolver_bounds_the_hosts_it_keeps(monkeypatch):
+    _stub_lookups(monkeypatch)
+    resolver = main.PrewarmingResolver(maxsize=2)
+
+    for i in range(5):
+        await resolver.resolve(f"hook{i}.example.com", 443)
+
+    assert len(resolver._lookups) == 2
+    assert ("hook4.example.com", 443) in resolver._lookups
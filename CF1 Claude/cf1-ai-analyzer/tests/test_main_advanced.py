@@ -0,0 +1,45 @@
+"""Tests for upload handling in main_advanced.py"""
+
+import asyncio
+
+import pytest
+
+import main_advanced
+
+
+@pytest.mark.asyncio
+async def test_extract_uploads_removes_directory_when_one_extraction_fails(monkeypatch, tmp_path):
+    upload_dir = tmp_path / "proposal-1"
+    upload_dir.mkdir()
+    paths = [str(upload_dir / "0_doc.txt"), str(upload_dir / "1_doc.txt")]
+    for path in paths:
+        open(path, "w").close()
+
+    async def extract_text_content(file_path, file_extension):
+        if file_path == paths[0]:
+            raise ValueError("unreadable")
+        await asyncio.sleep(0.05)  # Still running when the first extraction fails
+        return "text"
+
+    monkeypatch.setattr(main_advanced, "extract_text_content", extract_text_content)
+
+    with pytest.raises(ValueError, match="unreadable"):
+        await main_advanced.extract_uploads(paths, [".txt", ".txt"])
+    assert not upload_dir.exists()
+
+
+@pytest.mark.asyncio
+async def test_extract_uploads_returns_contents_in_order(monkeypatch, tmp_path):
+    upload_dir = tmp_path / "proposal-2"
+    upload_dir.mkdir()
+    paths = [str(upload_dir / f"{i}_doc.txt") for i in range(3)]
+    for path in paths:
+        open(path, "w").close()
+
+    async def extract_text_content(file_path, file_extension):
+        return file_path.rsplit("/", 1)[-1]
+
+    monkeypatch.setattr(main_advanced, "extract_text_content", extract_text_content)
+
+    assert await main_advanced.extract_uploads(paths, [".txt"] * 3) == ["0_doc.txt", "1_doc.txt", "2_doc.txt"]
+    assert not upload_dir.exists()
@@ -0,0 +1,83 @@
+"""Tests for the market scoring in market_intelligence.py"""
+
+import pytest
+
+from market_intelligence import (
+    CompetitorIntelligence,
+    EconomicIndicators,
+    MarketIntelligenceEngine,
+    MarketTrend,
+)
+
+
+def _trend(strength):
+    return MarketTrend(sector="fintech", trend_direction="bullish", strength=strength, timeframe="short", supporting_factors=[])
+
+
+def _competitor(growth_rate):
+    return CompetitorIntelligence(
+        company_name="Rival", market_cap="$1B", recent_funding="$10M", growth_rate=growth_rate,
+        key_metrics={}, competitive_advantages=[], recent_news=[]
+    )
+
+
+def _engine_with_environment(monkeypatch, **overrides):
+    engine = MarketIntelligenceEngine(claude_client=None)
+    environment = {
+        "market_trends": [_trend(0.8), _trend(0.4)],
+        "economic_indicators": EconomicIndicators(
+            gdp_growth=4.0, inflation_rate=2.0, interest_rates=0.0,
+            market_volatility=0.2, sector_performance={}, risk_sentiment="neutral"
+        ),
+        "competitor_intelligence": [],
+        "news_sentiment": {"sentiment_score": 0.0},
+        "ai_synthesis": {"market_timing": "good"},
+        **overrides
+    }
+
+    async def analyze_market_environment(sector, size, business_model):
+        return environment
+
+    monkeypatch.setattr(engine, "analyze_market_environment", analyze_market_environment)
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_market_score_is_weighted_sum_of_components(monkeypatch):
+    engine = _engine_with_environment(monkeypatch)
+
+    score = await engine.get_real_time_market_score("fintech", "b2b")
+
+    # trend 0.6, economy 1.0, competition 0.8, sentiment 0.5, timing 0.8
+    expected = 0.25 * 0.6 + 0.20 * 1.0 + 0.25 * 0.8 + 0.15 * 0.5 + 0.15 * 0.8
+    assert score == pytest.approx(expected)
+
+
+@pytest.mark.asyncio
+async def test_market_score_without_trends_is_neutral(monkeypatch):
+    engine = _engine_with_environment(monkeypatch, market_trends=[])
+
+    assert await engine.get_real_time_market_score("fintech", "b2b") == 0.6
+
+
+@pytest.mark.asyncio
+async def test_market_score_is_clamped(monkeypatch):
+    engine = _engine_with_environment(monkeypatch, news_sentiment={"sentiment_score": 20.0})
+
+    assert await engine.get_real_time_market_score("fintech", "b2b") == 1.0
+
+
+@pytest.mark.parametrize("growth_rates, expected", [
+    ([], 0.8),
+    (["120% YoY", "90%"], 0.6),
+    (["60%"], 0.7),
+    (["unknown"], 0.8),
+])
+def test_competitive_score_from_growth_rates(growth_rates, expected):
+    engine = MarketIntelligenceEngine(claude_client=None)
+
+    assert engine._calculate_competitive_score([_competitor(g) for g in growth_rates]) == expected
+
+
+def test_competitor_growth_rate_is_parsed():
+    assert _competitor("+45.5% YoY").growth_rate_pct == 45.5
@@ -0,0 +1,188 @@
+"""Tests for the rule-based and scoring helpers in regulatory_compliance.py"""
+
+import pytest
+
+from regulatory_compliance import (
+    REG_CF_LIMIT,
+    BSA_AML_TEMPLATE,
+    SEC_REG_CF_TEMPLATE,
+    SEC_REG_D_TEMPLATE,
+    ComplianceFlag,
+    ComplianceFramework,
+    ComplianceLevel,
+    ComplianceRequirement,
+    FileCache,
+    RegulatoryComplianceEngine,
+    RiskLevel,
+    _investor_tokens,
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return RegulatoryComplianceEngine(claude_client=None, cache=FileCache(str(tmp_path)))
+
+
+def _flag(status, risk_level, mandatory=True):
+    requirement = ComplianceRequirement(
+        framework=ComplianceFramework.SEC_REG_CF,
+        requirement_id="req",
+        description="",
+        mandatory=mandatory,
+        category="disclosure"
+    )
+    return ComplianceFlag(requirement=requirement, status=status, risk_level=risk_level, details="", recommended_action="")
+
+
+# _rule_based_frameworks
+
+def test_retail_offering_within_reg_cf_limit(engine):
+    frameworks = engine._rule_based_frameworks({"offering_amount": REG_CF_LIMIT}, "Retail investors", {})
+
+    assert frameworks == [ComplianceFramework.SEC_REG_CF, ComplianceFramework.BSA_AML]
+
+
+def test_retail_offering_above_reg_cf_limit_is_left_to_claude(engine):
+    assert engine._rule_based_frameworks({"offering_amount": REG_CF_LIMIT + 1}, "retail", {}) is None
+
+
+def test_offering_amount_strings_are_parsed(engine):
+    frameworks = engine._rule_based_frameworks({"funding_goal": "$1,500,000"}, "retail", {})
+
+    assert ComplianceFramework.SEC_REG_CF in frameworks
+
+
+@pytest.mark.parametrize("investors", ["non-accredited investors", "non accredited", "not accredited"])
+def test_non_accredited_investors_do_not_imply_reg_d(engine, investors):
+    assert engine._rule_based_frameworks({"offering_amount": 10_000_000}, investors, {}) is None
+
+
+@pytest.mark.parametrize("investors, offering_structure", [
+    ("non-retail", {}),
+    ("not retail investors", {}),
+    ("retail and non-accredited investors", {}),
+    ("accredited investors", {"offering_type": "non-public placement"}),
+])
+def test_negated_categories_are_left_to_claude(engine, investors, offering_structure):
+    assert engine._rule_based_frameworks({"offering_amount": 1_000_000}, investors, offering_structure) is None
+
+
+def test_accredited_investors_imply_reg_d(engine):
+    frameworks = engine._rule_based_frameworks({"offering_amount": 10_000_000}, "Accredited investors only", {})
+
+    assert frameworks == [ComplianceFramework.SEC_REG_D, ComplianceFramework.BSA_AML]
+
+
+def test_eu_jurisdiction_adds_mifid_and_gdpr(engine):
+    frameworks = engine._rule_based_frameworks(
+        {"offering_amount": 2_000_000},
+        "retail",
+        {"jurisdiction": "European Union"}
+    )
+
+    assert frameworks == [
+        ComplianceFramework.SEC_REG_CF,
+        ComplianceFramework.EU_MiFID,
+        ComplianceFramework.GDPR,
+        ComplianceFramework.BSA_AML,
+    ]
+
+
+def test_unknown_amount_is_left_to_claude(engine):
+    assert engine._rule_based_frameworks({}, "retail", {}) is None
+
+
+# Compliance score
+
+def test_compliance_score_without_flags_is_neutral(engine):
+    assert engine._calculate_compliance_score([]) == 0.5
+
+
+def test_compliance_score_weights_mandatory_and_risk(engine):
+    flags = [
+        _flag(ComplianceLevel.COMPLIANT, RiskLevel.LOW, mandatory=True),
+        _flag(ComplianceLevel.NEEDS_REVIEW, RiskLevel.HIGH, mandatory=False),
+    ]
+
+    expected = (1.0 * 1.0 + 0.7 * 0.7 * 0.5) / 1.5
+    assert engine._calculate_compliance_score(flags) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("status", list(ComplianceLevel))
+@pytest.mark.parametrize("risk_level", list(RiskLevel))
+def test_compliance_score_accepts_every_status_and_risk(engine, status, risk_level):
+    assert 0.0 <= engine._calculate_compliance_score([_flag(status, risk_level)]) <= 1.0
+
+
+# Quick checks
+
+@pytest.mark.asyncio
+async def test_quick_compliance_check(engine):
+    result = await engine.quick_compliance_check(1_000_000, "retail-investors, accredited", "fintech")
+
+    assert result == {
+        "sec_reg_cf": SEC_REG_CF_TEMPLATE,
+        "sec_reg_d": SEC_REG_D_TEMPLATE,
+        "bsa_aml": BSA_AML_TEMPLATE,
+    }
+
+
+@pytest.mark.asyncio
+async def test_quick_compliance_check_shares_results_between_calls(engine):
+    first = await engine.quick_compliance_check(1_000_000, "retail", "fintech")
+    second = await engine.quick_compliance_check(2_000_000, "Retail", "real estate")
+
+    assert first is second
+    with pytest.raises(TypeError):
+        first["sec_reg_cf"] = {}
+
+
+@pytest.mark.parametrize("investor_type, tokens", [
+    ("Retail investors", {"retail"}),
+    ("retail-investors, accredited", {"retail", "accredited"}),
+    ("non-retail", set()),
+    ("not accredited", set()),
+    ("non-accredited, qualified purchasers", {"qualified"}),
+    ("institutional", {"institutional"}),
+])
+def test_investor_tokens(investor_type, tokens):
+    assert _investor_tokens(investor_type) == tokens
+
+
+@pytest.mark.asyncio
+async def test_quick_compliance_batch_matches_single_checks(engine):
+    rows = [
+        (1_000_000, "retail", "fintech"),
+        (REG_CF_LIMIT + 1, "retail", "fintech"),
+        (1_000_000, "non-accredited", "retail"),
+    ]
+
+    batch = engine.quick_compliance_check_batch(rows)
+
+    assert batch == [await engine.quick_compliance_check(*row) for row in rows]
+    assert list(batch[2]) == ["bsa_aml"]
+
+
+# Flag parsing
+
+def test_build_flags_defaults_off_spec_values_instead_of_failing(engine):
+    requirement = ComplianceRequirement(
+        framework=ComplianceFramework.SEC_REG_CF,
+        requirement_id="req",
+        description="",
+        mandatory=True,
+        category="disclosure"
+    )
+    flag_data = [
+        {"requirement_id": "req", "status": "Partially Compliant", "risk_level": "severe"},
+        {"requirement_id": "req", "status": "NON_COMPLIANT", "risk_level": "High"},
+        {"requirement_id": "unknown", "status": "compliant"},
+        "not a flag",
+    ]
+
+    flags = engine._build_flags(flag_data, {"req": requirement})
+
+    assert [(flag.status, flag.risk_level) for flag in flags] == [
+        (ComplianceLevel.UNCLEAR, RiskLevel.MEDIUM),
+        (ComplianceLevel.NON_COMPLIANT, RiskLevel.HIGH),
+    ]
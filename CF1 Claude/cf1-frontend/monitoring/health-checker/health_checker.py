@@ -4,134 +4,326 @@ CF1 Platform Health Checker
 Monitors CF1 platform services and exposes metrics to Prometheus
 """
 
+import asyncio
+import bisect
+import functools
+import heapq
+import itertools
 import os
+import signal
+import ssl
+import threading
 import time
-import requests
-import schedule
-from prometheus_client import Counter, Gauge, Histogram, start_http_server
-from threading import Thread
+from collections import deque
+from urllib.parse import urlsplit
+import httpx
+from prometheus_client import REGISTRY, Histogram, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+from prometheus_client.utils import floatToGoString
+from psycopg_pool import AsyncConnectionPool
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+logging.getLogger('httpx').setLevel(logging.WARNING)  # Checks log their own outcome
 
 # Configuration
 CF1_API_URL = os.getenv('CF1_API_URL', 'http://cf1-frontend:80')
 CHECK_INTERVAL = int(os.getenv('CHECK_INTERVAL', '30'))
 METRICS_PORT = int(os.getenv('METRICS_PORT', '9091'))
+HEALTH_CACHE_TTL = int(os.getenv('HEALTH_CACHE_TTL', '10'))  # Seconds a probe result is reused
+CF1_DB_URL = os.getenv('CF1_DB_URL')  # PostgreSQL conninfo; the database check is skipped when unset
 
-# Prometheus metrics
-health_check_counter = Counter('cf1_health_checks_total', 'Total health checks', ['service', 'status'])
-health_check_duration = Histogram('cf1_health_check_duration_seconds', 'Health check duration', ['service'])
-service_up = Gauge('cf1_service_up', 'Service availability', ['service'])
-response_time = Gauge('cf1_response_time_seconds', 'Service response time', ['service'])
+# Probe results as (service_name, status, duration or None), folded into metrics at scrape time
+_probe_results = deque(maxlen=1024)
 
-# Service endpoints to monitor
-SERVICES = {
-    'frontend': f'{CF1_API_URL}/health',
-    'backend': f'{CF1_API_URL.replace(":80", ":3001")}/health',
-    'ai-analyzer': f'{CF1_API_URL.replace(":80", ":8000")}/health',
-}
+class ProbeResultCollector:
+    """Aggregates buffered probe results into the health check metrics on each scrape
+    
+    Probes only append to the ring buffer, so the metric state is locked once per
+    scrape instead of once per update.
+    """
+    
+    BUCKETS = Histogram.DEFAULT_BUCKETS
+    
+    def __init__(self, results):
+        self._results = results
+        self._lock = threading.Lock()
+        self._checks = {}         # (service_name, status) -> count
+        self._up = {}             # service_name -> 0/1
+        self._response_time = {}  # service_name -> last duration
+        self._durations = {}      # service_name -> ([count per bucket], sum)
+    
+    def _drain(self):
+        while self._results:
+            service_name, status, duration = self._results.popleft()
+            key = (service_name, status)
+            self._checks[key] = self._checks.get(key, 0) + 1
+            self._up[service_name] = 1 if status == 'success' else 0
+            if duration is None:
+                continue
+            self._response_time[service_name] = duration
+            counts, total = self._durations.get(service_name) or ([0] * len(self.BUCKETS), 0.0)
+            counts[bisect.bisect_left(self.BUCKETS, duration)] += 1
+            self._durations[service_name] = (counts, total + duration)
+    
+    def collect(self):
+        with self._lock:
+            self._drain()
+            
+            checks = CounterMetricFamily('cf1_health_checks_total', 'Total health checks', labels=['service', 'status'])
+            for (service_name, status), count in self._checks.items():
+                checks.add_metric([service_name, status], count)
+            
+            up = GaugeMetricFamily('cf1_service_up', 'Service availability', labels=['service'])
+            for service_name, value in self._up.items():
+                up.add_metric([service_name], value)
+            
+            rt = GaugeMetricFamily('cf1_response_time_seconds', 'Service response time', labels=['service'])
+            for service_name, duration in self._response_time.items():
+                rt.add_metric([service_name], duration)
+            
+            dur = HistogramMetricFamily('cf1_health_check_duration_seconds', 'Health check duration', labels=['service'])
+            for service_name, (counts, total) in self._durations.items():
+                cumulative = list(itertools.accumulate(counts))
+                dur.add_metric(
+                    [service_name],
+                    [(floatToGoString(bound), count) for bound, count in zip(self.BUCKETS, cumulative)],
+                    sum_value=total
+                )
+        
+        return [checks, up, rt, dur]
+
+REGISTRY.register(ProbeResultCollector(_probe_results))
+
+# Service endpoints to monitor as (service_name, url); all share the CF1_API_URL host
+_api_url = urlsplit(CF1_API_URL)
+_api_scheme = _api_url.scheme or 'http'
+_api_host = _api_url.hostname or 'localhost'
+_api_port = _api_url.port or (443 if _api_scheme == 'https' else 80)
+SERVICES = (
+    ('frontend', f'{_api_scheme}://{_api_host}:{_api_port}/health'),
+    ('backend', f'{_api_scheme}://{_api_host}:3001/health'),
+    ('ai-analyzer', f'{_api_scheme}://{_api_host}:8000/health'),
+)
+
+# Neutron testnet endpoints as (service_name, url)
+NEUTRON_ENDPOINTS = (
+    ('neutron-rpc', 'https://rpc-palvus.pion-1.ntrn.tech'),
+    ('neutron-rest', 'https://rest-palvus.pion-1.ntrn.tech'),
+)
+
+# Neutron endpoints are probed every BLOCKCHAIN_CHECK_INTERVAL seconds while healthy;
+# each failure doubles that endpoint's interval up to BLOCKCHAIN_BACKOFF_MAX
+BLOCKCHAIN_CHECK_INTERVAL = 30
+BLOCKCHAIN_BACKOFF_MAX = 600
+_backoff = {name: BLOCKCHAIN_CHECK_INTERVAL for name, _ in NEUTRON_ENDPOINTS}
+
+def _tls_context():
+    """Verifying TLS context with session tickets enabled and kernel TLS where supported"""
+    ctx = ssl.create_default_context()
+    ctx.set_ciphers('ECDHE+AESGCM')
+    ctx.options &= ~ssl.OP_NO_TICKET
+    ctx.options |= getattr(ssl, 'OP_ENABLE_KTLS', 0)  # Python 3.12+ with an OpenSSL built for kTLS
+    return ctx
+
+# Shared keep-alive client; HTTP/2 multiplexes concurrent checks to a host over one connection
+_client = httpx.AsyncClient(
+    http2=True,
+    verify=_tls_context(),
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    timeout=10.0
+)
+
+# Warm connections for the database check, opened by run_scheduler so probes skip the TCP+auth handshake;
+# idle connections are recycled after 5 minutes instead of being pinged before each use
+_db_pool = AsyncConnectionPool(
+    CF1_DB_URL,
+    min_size=1,
+    max_size=2,
+    timeout=5,
+    max_idle=300,
+    open=False,
+    kwargs={'autocommit': True, 'options': '-c statement_timeout=2000'}
+) if CF1_DB_URL else None
+
+# Status codes that count as healthy
+_STATUS_OK = frozenset({200})
+
+# URLs that rejected HEAD; probed with a bodiless GET from then on
+_head_unsupported = set()
+
+# service_name -> (monotonic probe time, duration, status code or None on error)
+_last_probe = {}
+
+# Set to stop the scheduler; it sleeps on this until the next job is due
+stop_event = asyncio.Event()
+
+# Min-heap of (next run on the monotonic clock, sequence, interval, job)
+_timers = []
+_timer_seq = itertools.count()
+
+# Set when a job lands at the head of _timers, so run_timers recomputes its sleep
+_timers_changed = asyncio.Event()
+
+async def probe_status(url):
+    """Status code of url without reading a response body
+    
+    Uses HEAD, falling back to a streamed GET for endpoints that answer 405/501.
+    """
+    if url not in _head_unsupported:
+        response = await _client.head(url)
+        if response.status_code not in (405, 501):
+            return response.status_code
+        _head_unsupported.add(url)
+    
+    async with _client.stream('GET', url) as response:
+        return response.status_code
 
-def check_service_health(service_name, url):
+async def check_service_health(service_name, url):
     """Check health of a specific service"""
-    start_time = time.time()
+    last = _last_probe.get(service_name)
+    if last is not None and time.monotonic() - last[0] < HEALTH_CACHE_TTL:
+        # Probed moments ago; the exported metrics already hold that result
+        return
+    
+    start_time = time.perf_counter()
     
     try:
-        response = requests.get(url, timeout=10)
-        duration = time.time() - start_time
+        status_code = await probe_status(url)
+        duration = time.perf_counter() - start_time
         
-        if response.status_code == 200:
-            service_up.labels(service=service_name).set(1)
-            health_check_counter.labels(service=service_name, status='success').inc()
-            logger.info(f"✅ {service_name} is healthy (response time: {duration:.2f}s)")
+        if status_code in _STATUS_OK:
+            _probe_results.append((service_name, 'success', duration))
+            logger.info("✅ %s is healthy (response time: %.2fs)", service_name, duration)
+            if service_name in _backoff:
+                _backoff[service_name] = BLOCKCHAIN_CHECK_INTERVAL
         else:
-            service_up.labels(service=service_name).set(0)
-            health_check_counter.labels(service=service_name, status='failure').inc()
-            logger.warning(f"❌ {service_name} returned status {response.status_code}")
+            _probe_results.append((service_name, 'failure', duration))
+            logger.warning("❌ %s returned status %s", service_name, status_code)
+            if service_name in _backoff:
+                _backoff[service_name] = min(_backoff[service_name] * 2, BLOCKCHAIN_BACKOFF_MAX)
         
-        response_time.labels(service=service_name).set(duration)
-        health_check_duration.labels(service=service_name).observe(duration)
+        _last_probe[service_name] = (time.monotonic(), duration, status_code)
         
-    except requests.exceptions.RequestException as e:
-        duration = time.time() - start_time
-        service_up.labels(service=service_name).set(0)
-        health_check_counter.labels(service=service_name, status='error').inc()
-        response_time.labels(service=service_name).set(duration)
-        health_check_duration.labels(service=service_name).observe(duration)
-        logger.error(f"❌ {service_name} health check failed: {e}")
-
-def check_all_services():
+    except httpx.HTTPError as e:
+        duration = time.perf_counter() - start_time
+        _probe_results.append((service_name, 'error', duration))
+        _last_probe[service_name] = (time.monotonic(), duration, None)
+        logger.error("❌ %s health check failed: %s", service_name, e)
+        if service_name in _backoff:
+            _backoff[service_name] = min(_backoff[service_name] * 2, BLOCKCHAIN_BACKOFF_MAX)
+
+async def check_services_concurrently(targets):
+    """Check (service_name, url) pairs concurrently and wait for all of them"""
+    results = await asyncio.gather(
+        *(check_service_health(service_name, url) for service_name, url in targets),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error("❌ Health check raised unexpectedly: %s", result)
+
+async def check_all_services():
     """Check health of all services"""
     logger.info("🔍 Running health checks...")
     
-    for service_name, url in SERVICES.items():
-        check_service_health(service_name, url)
+    await check_services_concurrently(SERVICES)
     
     logger.info("✅ Health checks completed")
 
-def check_database_health():
-    """Check database connectivity (if applicable)"""
+async def check_database_health():
+    """Check database connectivity over a pooled connection"""
+    if _db_pool is None:
+        return
+    
+    start_time = time.perf_counter()
     try:
-        # This would check database connectivity
-        # For now, we'll simulate a database check
         logger.info("🔍 Checking database health...")
-        # db_check_result = check_database_connection()
-        # service_up.labels(service='database').set(1 if db_check_result else 0)
-        service_up.labels(service='database').set(1)  # Simulated
+        async with _db_pool.connection() as conn:
+            cur = await conn.execute('SELECT 1')
+            await cur.fetchone()
+        _probe_results.append(('database', 'success', time.perf_counter() - start_time))
         logger.info("✅ Database is healthy")
     except Exception as e:
-        service_up.labels(service='database').set(0)
-        logger.error(f"❌ Database health check failed: {e}")
-
-def check_blockchain_connectivity():
-    """Check blockchain RPC connectivity"""
-    neutron_endpoints = [
-        'https://rpc-palvus.pion-1.ntrn.tech',
-        'https://rest-palvus.pion-1.ntrn.tech'
-    ]
-    
-    for endpoint in neutron_endpoints:
-        service_name = f"neutron-{'rpc' if 'rpc' in endpoint else 'rest'}"
-        check_service_health(service_name, endpoint)
-
-def run_scheduler():
-    """Run the health check scheduler"""
-    logger.info(f"🚀 Starting CF1 Health Checker (check interval: {CHECK_INTERVAL}s)")
-    
-    # Schedule health checks
-    schedule.every(CHECK_INTERVAL).seconds.do(check_all_services)
-    schedule.every(60).seconds.do(check_database_health)
-    schedule.every(30).seconds.do(check_blockchain_connectivity)
-    
-    # Run initial checks
-    check_all_services()
-    check_database_health()
-    check_blockchain_connectivity()
-    
-    # Run scheduler
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+        _probe_results.append(('database', 'error', time.perf_counter() - start_time))
+        logger.error("❌ Database health check failed: %s", e)
+
+async def check_blockchain_connectivity(service_name, url):
+    """Check one blockchain RPC endpoint and schedule its next probe after its backoff"""
+    try:
+        await check_service_health(service_name, url)
+    finally:
+        schedule_job(None, functools.partial(check_blockchain_connectivity, service_name, url), delay=_backoff[service_name])
+
+def schedule_job(interval, job, delay=0):
+    """Run the job coroutine function after delay seconds and then every interval seconds
+    
+    An interval of None runs the job once; such jobs may schedule their own next run.
+    """
+    entry = (time.monotonic() + delay, next(_timer_seq), interval, job)
+    heapq.heappush(_timers, entry)
+    if _timers[0] is entry:
+        _timers_changed.set()
+
+async def run_timers():
+    """Start due jobs in deadline order, sleeping until the next deadline, a new earlier job or stop_event"""
+    running = set()
+    
+    while not stop_event.is_set():
+        now = time.monotonic()
+        while _timers and _timers[0][0] <= now:
+            due, seq, interval, job = heapq.heappop(_timers)
+            # Jobs run as tasks so a slow probe never delays another job's deadline
+            task = asyncio.create_task(job())
+            running.add(task)
+            task.add_done_callback(running.discard)
+            if interval is not None:
+                heapq.heappush(_timers, (max(due + interval, now), seq, interval, job))
+        
+        timeout = _timers[0][0] - now if _timers else None
+        _timers_changed.clear()
+        waiters = [asyncio.create_task(stop_event.wait()), asyncio.create_task(_timers_changed.wait())]
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in waiters:
+            waiter.cancel()
+    
+    await asyncio.gather(*running, return_exceptions=True)
+
+async def run_scheduler():
+    """Run the health check scheduler until SIGTERM or SIGINT"""
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop_event.set)
+    
+    logger.info("🚀 Starting CF1 Health Checker (check interval: %ss)", CHECK_INTERVAL)
+    
+    # Schedule health checks; each also runs once immediately
+    schedule_job(CHECK_INTERVAL, check_all_services)
+    schedule_job(60, check_database_health)
+    for service_name, url in NEUTRON_ENDPOINTS:
+        schedule_job(None, functools.partial(check_blockchain_connectivity, service_name, url))
+    
+    if _db_pool is not None:
+        await _db_pool.open()
+    
+    try:
+        await run_timers()
+    finally:
+        await _client.aclose()
+        if _db_pool is not None:
+            await _db_pool.close()
 
 def main():
     """Main function"""
     # Start Prometheus metrics server
     start_http_server(METRICS_PORT)
-    logger.info(f"📊 Metrics server started on port {METRICS_PORT}")
+    logger.info("📊 Metrics server started on port %s", METRICS_PORT)
     
-    # Start health check scheduler in a separate thread
-    scheduler_thread = Thread(target=run_scheduler)
-    scheduler_thread.daemon = True
-    scheduler_thread.start()
-    
-    # Keep the main thread alive
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        logger.info("🛑 Shutting down health checker...")
+    # The metrics server runs on its own daemon thread, so the scheduler owns the main thread
+    asyncio.run(run_scheduler())
+    logger.info("🛑 Health checker stopped")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file